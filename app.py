@@ -1,334 +1,522 @@
 import streamlit as st
 import pytesseract
 import fitz  # PyMuPDF
-from PIL import Image
-import os
-import re
 import pandas as pd
-from datetime import datetime
-import glob
-import tempfile
-import shutil
+import time
+from cache_ocr import CacheOCR, hash_contenido, parametros_cache
+from cache_resultados import CacheResultados
+from clasificador import clasificador
+from extraccion import FRACCION_RECORTE, contar_paginas, extraer_textos_pdf
+from motores_ocr import (
+    MOTORES_EASYOCR,
+    MOTORES_OCR,
+    easyocr_disponible,
+    hilos_torch_por_proceso,
+)
+from paralelo import (
+    UMBRAL_PAGINAS_REPARTO,
+    extraer_textos_en_worker,
+    extraer_textos_repartidos,
+    inicializar_worker,
+    mapear_en_paralelo,
+    workers_disponibles,
+)
+from resultados import EscritorResultados, pdf_con_paginas
+from tiempos import (
+    filas_tiempos,
+    resumen_lecturas,
+    resumen_tiempos,
+    tiempos_a_csv,
+    tiempos_a_json,
+)
+from trabajos import InformeArchivo, Trabajo, formatear_duracion
 
 # Configurar la ruta de Tesseract (ajusta según tu instalación)
 pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 
+# Segundos entre actualizaciones del avance mientras se procesa
+INTERVALO_ACTUALIZACION = 0.5
+
 # Configurar página de Streamlit
 st.set_page_config(page_title="Lector de Facturas", page_icon="📄", layout="wide")
 
 
 class LectorFacturas:
-    def __init__(self):
+    def __init__(
+        self,
+        usar_capa_texto=True,
+        fraccion_recorte=FRACCION_RECORTE,
+        preprocesar=False,
+        escalonada=False,
+        workers=1,
+        umbral_paginas_reparto=UMBRAL_PAGINAS_REPARTO,
+        usar_cache_ocr=True,
+        cache_resultados=None,
+        motor_ocr="tesseract",
+    ):
         self.facturas_procesadas = []
         self.pdfs_modificados = []
-
-    def extraer_texto_paginas_pdf(self, pdf_path):
-        """Extrae el texto de cada página del PDF como una lista."""
-        textos_paginas = []
+        # Motor de OCR: "tesseract" usa tesserocr si está instalado y si no
+        # pytesseract; también se puede forzar "tesserocr" o "pytesseract"
+        self.motor_ocr = motor_ocr
+        # Hilos de torch de cada proceso del pool con los motores que usan
+        # EasyOCR (sin límite, cada proceso usaría todos los núcleos)
+        self.hilos_torch = (
+            hilos_torch_por_proceso(workers) if motor_ocr in MOTORES_EASYOCR else None
+        )
+        # Cantidad de procesos para procesar varios PDFs a la vez (1 = secuencial)
+        self.workers = workers
+        # PDFs con al menos estas páginas se reparten por páginas entre los procesos
+        self.umbral_paginas_reparto = umbral_paginas_reparto
+        # Fracción superior de cada página que se lee
+        self.fraccion_recorte = fraccion_recorte
+        # Leer primero la capa de texto nativa (PDFs digitales) antes de usar OCR
+        self.usar_capa_texto = usar_capa_texto
+        # Binarizar y recortar la imagen de cada región antes del OCR
+        self.preprocesar = preprocesar
+        # Leer primero una región más chica y con menos resolución, y volver a
+        # leer más solo las páginas indecisas (ver `etapas_lectura`)
+        self.escalonada = escalonada
+        # Método usado en cada página del último PDF ("texto" u "ocr")
+        self.metodos_paginas = []
+        # Segundos de cada etapa en cada página del último PDF (ver `tiempos`)
+        self.tiempos_paginas = []
+        # Caché en disco de los textos ya leídos (por contenido del PDF)
+        self.cache_ocr = CacheOCR() if usar_cache_ocr else None
+        # Caché en memoria de textos y decisiones por archivo (entre sesiones)
+        self.cache_resultados = cache_resultados
+        # Error de la última extracción (None si se leyeron todas las páginas)
+        self.ultimo_error = None
+        # Mensajes de error del último PDF (se muestran en la página al terminar)
+        self.avisos = []
+        # Páginas de facturas del último PDF y si el resultado vino de la caché
+        self.paginas_facturas = []
+        self.resultado_en_cache = False
+
+    def cache_paginas(self, datos_pdf):
+        """Caché de OCR de este PDF con los parámetros actuales (o None)."""
+        if self.cache_ocr is None:
+            return None
         try:
-            doc = fitz.open(pdf_path)
-            for pagina_num in range(len(doc)):
-                pagina = doc.load_page(pagina_num)
-                mat = fitz.Matrix(2.0, 2.0)
-                pix = pagina.get_pixmap(matrix=mat)
-                img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-
-                # Solo procesar el 25% superior de la imagen
-                altura = img.height
-                altura_procesar = int(altura * 0.25)
-                img_recortada = img.crop((0, 0, img.width, altura_procesar))
-
-                texto_pagina = pytesseract.image_to_string(
-                    img_recortada, lang="spa+eng", config="--psm 6 --oem 3"
-                )
-                textos_paginas.append(texto_pagina)
-            doc.close()
-        except Exception as e:
-            st.error(f"Error al procesar PDF: {str(e)}")
+            return self.cache_ocr.para_contenido(
+                datos_pdf,
+                self.motor_ocr,
+                self.usar_capa_texto,
+                self.fraccion_recorte,
+                self.preprocesar,
+                self.escalonada,
+            )
+        except Exception:
+            return None
+
+    def clave_resultados(self, datos_pdf):
+        """Clave de la caché de resultados: contenido del PDF y parámetros de lectura."""
+        return (
+            hash_contenido(datos_pdf),
+            parametros_cache(
+                self.motor_ocr,
+                self.usar_capa_texto,
+                self.fraccion_recorte,
+                self.preprocesar,
+                self.escalonada,
+            ),
+        )
+
+    def extraer_texto_paginas_pdf(self, doc, datos_pdf, progreso=None):
+        """Extrae el texto de cada página del documento abierto como una lista.
+
+        Con varios workers, los PDFs grandes se reparten por páginas entre
+        procesos; cada uno abre su copia desde `datos_pdf`. `progreso` recibe
+        la cantidad de páginas que se van leyendo.
+        """
+        self.tiempos_paginas = []
+        if self.workers > 1 and len(doc) >= self.umbral_paginas_reparto:
+            textos_paginas, self.metodos_paginas, error = extraer_textos_repartidos(
+                datos_pdf,
+                self.motor_ocr,
+                self.workers,
+                self.usar_capa_texto,
+                self.fraccion_recorte,
+                inicializar_worker,
+                (pytesseract.pytesseract.tesseract_cmd, self.hilos_torch),
+                cache=self.cache_paginas(datos_pdf),
+                progreso=progreso,
+                tiempos=self.tiempos_paginas,
+                preprocesar=self.preprocesar,
+                escalonada=self.escalonada,
+            )
+        else:
+            textos_paginas, self.metodos_paginas, error = extraer_textos_pdf(
+                doc,
+                MOTORES_OCR[self.motor_ocr],
+                self.usar_capa_texto,
+                self.fraccion_recorte,
+                cache=self.cache_paginas(datos_pdf),
+                progreso=progreso,
+                tiempos=self.tiempos_paginas,
+                preprocesar=self.preprocesar,
+                escalonada=self.escalonada,
+            )
+        self.ultimo_error = error
+        if error:
+            self.avisos.append(f"Error al procesar PDF: {error}")
         return textos_paginas
 
     def es_factura(self, texto):
         """Valida si el documento es una factura con patrón específico."""
-        texto_lower = texto.lower()
-
-        # Palabras que indican que NO es una factura
-        no_factura = [
-            "remito",
-            "orden de compra",
-            "pedido",
-            "presupuesto",
-            "cotización",
-            "proforma",
-            "documento no valido como factura",
-            "no valido como factura",
-            "no válido como factura",
-        ]
-
-        # Verificar que NO sea un documento que no queremos
-        exclusion_count = sum(1 for palabra in no_factura if palabra in texto_lower)
-
-        if exclusion_count >= 2:
-            return False
-
-        # Verificar documentos específicos que siempre se excluyen
-        if "documento no" in texto_lower:
-            return False
-
-        # Verificar si contiene "COMO FACTURA" con posibles errores de OCR
-        if (
-            "como factura" in texto_lower
-            or "cowo factura" in texto_lower
-            or "cowo factura" in texto_lower
-            or "como factura" in texto_lower
-        ) and "no es un documento valido" not in texto_lower:
-            return False
-
-        # Mejorar detección de emails con patrones más específicos
-        patrones_email = [
-            r"^\d{1,2}/\d{1,2}/\d{2,4},\s*\d{1,2}:\d{2}",  # Fecha y hora al inicio
-            r"correo de\s+\w+",  # "Correo de [nombre]"
-            r"fwd:\s*",  # "Fwd:"
-            r"re:\s*",  # "Re:"
-            r"para:\s*",  # "Para:"
-            r"de:\s*",  # "De:"
-            r"asunto:\s*",  # "Asunto:"
-            r"adjuntos?\s*\d*",  # "adjunto" o "adjuntos"
-            r"\d+k\s*$",  # Tamaño de archivo al final (ej: "36K")
-            r"\d+\s+mensajes?",  # "3 mensajes" o "1 mensaje"
-        ]
-
-        # Contar cuántos patrones de email se encuentran
-        patrones_email_encontrados = 0
-        for patron in patrones_email:
-            if re.search(patron, texto_lower):
-                patrones_email_encontrados += 1
-
-        # Si hay múltiples patrones de email, es muy probable que sea un email
-        if patrones_email_encontrados >= 2:
-            return False
-
-        # Verificar estructura específica de email con "Fwd:" o "Re:"
-        if any(palabra in texto_lower for palabra in ["fwd:", "re:", "correo de"]):
-            lineas = texto_lower.split("\n")
-            lineas_con_email = sum(
-                1
-                for linea in lineas
-                if any(
-                    palabra in linea
-                    for palabra in [
-                        "correo de",
-                        "re:",
-                        "fwd:",
-                        "para:",
-                        "de:",
-                        "asunto:",
-                        "mensaje",
-                        "escribio:",
-                        "escribió:",
-                        "adjuntos",
-                        "adjunto",
-                    ]
-                )
-            )
-
-            if lineas_con_email >= 1 and "factura" in texto_lower:
-                if any(
-                    palabra in texto_lower
-                    for palabra in [
-                        "realizar la factura",
-                        "factura correspondiente",
-                        "enviar factura",
-                        "fwd: factura",
-                        "re: factura",
-                    ]
-                ):
-                    return False
-
-            if lineas_con_email >= 2:
-                return False
-
-        # Verificar si contiene "factura" o "facturas" directamente
-        if "factura" in texto_lower or "facturas" in texto_lower:
-            return True
-
-        # Patrón específico para factura
-        patrones_factura = [
-            r"factura\s+n[°º]?\s*:\s*\d+-\d+",  # FACTURA N°: 0003-00016403
-            r"factura\s+n[°º]?\s*\d+-\d+",  # FACTURA N° 0003-00016403
-            r"factura\s+n[°º]?\s*:\s*\d+/\d+",  # FACTURA N°: 0003/00016403
-            r"factura\s+n[°º]?\s*\d+/\d+",  # FACTURA N° 0003/00016403
-            r"punto de venta\s*:\s*\d+\s+comp\.?nro\s*:\s*\d+",  # Punto de Venta: 00004 Comp.Nro: 00006772
-            r"punto de venta\s*:\s*\d+\s+comp\s*nro\s*:\s*\d+",  # Punto de Venta: 00004 Comp Nro: 00006772
-            r"cod\.\s*\d+",  # COD. 01
-            r"codigo\s*\d+",  # CODIGO 01
-            r"cod\.\s*n[°º]?\s*\d+",  # Cod.N° 01
-            r"cod\s*n[°º]?\s*\d+",  # Cod N° 01 (sin punto)
-            r"cod\.\s*n\s*\d+",  # Cod.N 01 (sin símbolo)
-            r"cod\s*n\s*\d+",  # Cod N 01 (sin punto ni símbolo)
-            r"cod\.\s*n[°º]?\s*\d+\s*\w*",  # Cod.N° 01 jo (con caracteres extra)
-            r"cod\s*n[°º]?\s*\d+\s*\w*",  # Cod N° 01 jo (sin punto, con caracteres extra)
-            r"céd\.\s*\d+",  # Céd. 01
-            r"céd\s*\d+",  # Céd 01 (sin punto)
-            r"empresa distribuidora y comercializadora norte s\.a\.",  # Empresa Distribuidora y Comercializadora Norte S.A.
-            r"amx argentina s\.a",  # AMX ARGENTINA S.A
-        ]
-
-        # Buscar el patrón específico
-        for patron in patrones_factura:
-            if re.search(patron, texto_lower):
-                return True
-
-        return False
+        return clasificador.es_factura(texto)
 
     def procesar_pdf_individual(
-        self, pdf_path, numero_orden, output_dir, nombre_original=None
+        self,
+        datos_pdf,
+        numero_orden,
+        nombre_original,
+        textos_extraidos=None,
+        clave_resultados=None,
+        progreso=None,
     ):
-        """Procesa un PDF individual y extrae solo las páginas que son facturas."""
-        with st.spinner(
-            f"Procesando PDF {numero_orden}: {nombre_original or os.path.basename(pdf_path)}"
-        ):
-            textos_paginas = self.extraer_texto_paginas_pdf(pdf_path)
+        """Procesa un PDF en memoria y extrae solo las páginas que son facturas.
+
+        El documento se abre una sola vez y se usa tanto para leer el texto como
+        para armar el resultado. Devuelve (nombre, contenido en bytes) o None;
+        los errores quedan en `avisos`. `textos_extraidos` es el resultado de
+        `extraer_textos_en_worker` si el texto ya se extrajo en un proceso
+        del pool. Los segundos por etapa de cada página quedan en
+        `tiempos_paginas`.
+        Con `clave_resultados` se reutilizan los textos y decisiones guardados
+        en la caché de resultados.
+        """
+        self.avisos = []
+        self.metodos_paginas = []
+        self.tiempos_paginas = []
+        self.paginas_facturas = []
+        self.resultado_en_cache = False
+        try:
+            doc = fitz.open(stream=datos_pdf, filetype="pdf")
+        except Exception as e:
+            self.avisos.append(f"Error al abrir PDF: {str(e)}")
+            return None
+
+        with doc:
+            resultado = None
+            if clave_resultados is not None:
+                resultado = self.cache_resultados.obtener(clave_resultados)
+
+            if resultado is not None:
+                textos_paginas, self.metodos_paginas, paginas_facturas = resultado
+                self.tiempos_paginas = [{"cache": 0.0} for _ in textos_paginas]
+                self.resultado_en_cache = True
+                if progreso is not None:
+                    progreso(len(textos_paginas))
+            elif textos_extraidos is None:
+                textos_paginas = self.extraer_texto_paginas_pdf(
+                    doc, datos_pdf, progreso
+                )
+            else:
+                (
+                    textos_paginas,
+                    self.metodos_paginas,
+                    error,
+                    self.tiempos_paginas,
+                ) = textos_extraidos
+                self.ultimo_error = error
+                if error:
+                    self.avisos.append(f"Error al procesar PDF: {error}")
             if not textos_paginas:
-                st.error("No se pudo extraer texto del PDF.")
+                self.avisos.append("No se pudo extraer texto del PDF.")
                 return None
 
-            # Lista para guardar índices de páginas que son facturas
-            paginas_facturas = []
-
-            for idx, texto in enumerate(textos_paginas):
-                if self.es_factura(texto):
-                    paginas_facturas.append(idx)
+            if resultado is None:
+                # Lista para guardar índices de páginas que son facturas
+                paginas_facturas = []
+
+                for idx, texto in enumerate(textos_paginas):
+                    inicio = time.perf_counter()
+                    if self.es_factura(texto):
+                        paginas_facturas.append(idx)
+                    self.tiempos_paginas[idx]["clasificacion"] = (
+                        time.perf_counter() - inicio
+                    )
+
+                # Guardar solo resultados completos (sin errores de lectura)
+                if clave_resultados is not None and not self.ultimo_error:
+                    self.cache_resultados.guardar(
+                        clave_resultados,
+                        (textos_paginas, self.metodos_paginas, paginas_facturas),
+                    )
+            self.paginas_facturas = paginas_facturas
 
             # Si hay páginas de facturas, crear nuevo PDF
+            inicio = time.perf_counter()
             if paginas_facturas:
-                nuevo_pdf_path = self.crear_pdf_solo_facturas(
-                    pdf_path,
-                    paginas_facturas,
-                    numero_orden,
-                    output_dir,
-                    nombre_original,
+                nuevo_pdf = self.crear_pdf_solo_facturas(
+                    doc, paginas_facturas, numero_orden, nombre_original
                 )
-                return nuevo_pdf_path
             else:
                 # Crear una copia del PDF original con el prefijo de orden
-                nuevo_pdf_path = self.crear_copia_pdf_original(
-                    pdf_path, numero_orden, output_dir, nombre_original
+                nuevo_pdf = self.crear_copia_pdf_original(
+                    datos_pdf, numero_orden, nombre_original
                 )
-                return nuevo_pdf_path
+            segundos_salida = time.perf_counter() - inicio
+            for tiempos_pagina in self.tiempos_paginas:
+                tiempos_pagina["salida"] = segundos_salida / len(textos_paginas)
+            return nuevo_pdf
 
     def crear_pdf_solo_facturas(
-        self,
-        pdf_original,
-        paginas_facturas,
-        numero_orden,
-        output_dir,
-        nombre_original=None,
+        self, doc_original, paginas_facturas, numero_orden, nombre_original
     ):
-        """Crea un nuevo PDF con solo las páginas que son facturas."""
+        """Crea en memoria un nuevo PDF con solo las páginas que son facturas.
+
+        Las páginas se seleccionan sobre el documento ya abierto (que queda
+        modificado). Devuelve (nombre, contenido en bytes) o None si falla.
+        """
         try:
-            # Abrir PDF original
-            doc_original = fitz.open(pdf_original)
+            # Generar nombre del nuevo archivo usando el nombre original
+            nuevo_nombre = f"{numero_orden:03d}_{nombre_original}"
 
-            # Crear nuevo PDF
-            doc_nuevo = fitz.open()
+            # Quedarse solo con las páginas que son facturas, sin pasar por disco
+            contenido = pdf_con_paginas(doc_original, paginas_facturas)
 
-            # Copiar solo las páginas que son facturas
-            for pagina_idx in paginas_facturas:
-                doc_nuevo.insert_pdf(
-                    doc_original, from_page=pagina_idx, to_page=pagina_idx
-                )
+            return nuevo_nombre, contenido
 
-            # Generar nombre del nuevo archivo usando el nombre original
-            if nombre_original:
-                nombre_base = nombre_original
-            else:
-                nombre_base = os.path.basename(pdf_original)
+        except Exception as e:
+            self.avisos.append(f"Error al crear PDF: {str(e)}")
+            return None
 
-            nuevo_nombre = f"{numero_orden:03d}_{nombre_base}"
-            nuevo_path = os.path.join(output_dir, nuevo_nombre)
+    def crear_copia_pdf_original(self, datos_pdf, numero_orden, nombre_original):
+        """Crea una copia del PDF original con prefijo de orden.
 
-            # Guardar nuevo PDF
-            doc_nuevo.save(nuevo_path)
-            doc_nuevo.close()
-            doc_original.close()
+        La copia es el mismo contenido, byte por byte: no se vuelve a generar
+        el PDF. Devuelve (nombre, contenido en bytes).
+        """
+        # Generar nombre del nuevo archivo usando el nombre original
+        nuevo_nombre = f"{numero_orden:03d}_{nombre_original}"
+        return nuevo_nombre, datos_pdf
 
-            return nuevo_path
+    def procesar_archivos(self, archivos, escritor, trabajo):
+        """Procesa los archivos subidos en memoria (sin archivos temporales).
 
-        except Exception as e:
-            st.error(f"Error al crear PDF: {str(e)}")
-            return None
+        Corre en el hilo de `trabajo` (un `Trabajo`), así que no llama a
+        Streamlit: el avance por página y un `InformeArchivo` por archivo quedan
+        en el trabajo. `archivos` es una lista de (nombre, contenido) y cada PDF
+        resultante se pasa a `escritor` apenas se genera. Devuelve el escritor.
+        """
+        # Contenido de cada archivo (Streamlit ya lo tiene en memoria)
+        datos_archivos = [datos_pdf for _, datos_pdf in archivos]
+
+        # Clave de cada archivo en la caché de resultados (por contenido)
+        claves = [
+            self.clave_resultados(datos_pdf)
+            if self.cache_resultados is not None
+            else None
+            for datos_pdf in datos_archivos
+        ]
 
-    def crear_copia_pdf_original(
-        self, pdf_original, numero_orden, output_dir, nombre_original=None
-    ):
-        """Crea una copia del PDF original con prefijo de orden."""
-        try:
-            # Abrir PDF original
-            doc_original = fitz.open(pdf_original)
+        # Extraer el texto de varios archivos a la vez en un pool de procesos;
+        # los resultados vuelven en el orden de subida
+        textos_por_archivo = [None] * len(datos_archivos)
+        if self.workers > 1:
+            # Los PDFs grandes no van al pool de archivos (se reparten por
+            # páginas al procesarlos), ni los que ya están en la caché
+            indices = [
+                idx
+                for idx, datos_pdf in enumerate(datos_archivos)
+                if contar_paginas(datos_pdf) < self.umbral_paginas_reparto
+                and not (
+                    claves[idx] is not None
+                    and self.cache_resultados.contiene(claves[idx])
+                )
+            ]
+            tareas = [
+                (
+                    datos_pdf,
+                    self.motor_ocr,
+                    self.usar_capa_texto,
+                    self.fraccion_recorte,
+                    None,
+                    self.cache_paginas(datos_pdf),
+                    1,
+                    self.preprocesar,
+                    self.escalonada,
+                )
+                for datos_pdf in (datos_archivos[idx] for idx in indices)
+            ]
+            trabajo.empezar_archivo(
+                f"Extrayendo texto de {len(tareas)} archivos con {self.workers} procesos"
+            )
+            resultados = mapear_en_paralelo(
+                extraer_textos_en_worker,
+                tareas,
+                self.workers,
+                inicializar_worker,
+                (pytesseract.pytesseract.tesseract_cmd, self.hilos_torch),
+                lambda resultado: trabajo.avanzar(len(resultado[1])),
+            )
+            for idx, resultado in zip(indices, resultados):
+                textos_por_archivo[idx] = resultado
 
-            # Crear nuevo PDF
-            doc_nuevo = fitz.open()
+        # Procesar cada archivo
+        for i, ((nombre, datos_pdf), textos_extraidos, clave) in enumerate(
+            zip(archivos, textos_por_archivo, claves), 1
+        ):
+            trabajo.empezar_archivo(f"PDF {i}: {nombre}")
+            nuevo_pdf = self.procesar_pdf_individual(
+                datos_pdf, i, nombre, textos_extraidos, clave, trabajo.avanzar
+            )
+            if nuevo_pdf:
+                nombre_salida, contenido = nuevo_pdf
+                escritor.agregar(nombre_salida, contenido)
+                self.pdfs_modificados.append(nombre_salida)
+            trabajo.agregar_informe(
+                InformeArchivo(
+                    i,
+                    nombre,
+                    self.metodos_paginas,
+                    self.paginas_facturas,
+                    self.resultado_en_cache,
+                    self.avisos,
+                    nuevo_pdf[0] if nuevo_pdf else None,
+                    self.tiempos_paginas,
+                )
+            )
 
-            # Copiar todas las páginas del PDF original
-            doc_nuevo.insert_pdf(doc_original)
+        return escritor
 
-            # Generar nombre del nuevo archivo usando el nombre original
-            if nombre_original:
-                nombre_base = nombre_original
-            else:
-                nombre_base = os.path.basename(pdf_original)
 
-            nuevo_nombre = f"{numero_orden:03d}_{nombre_base}"
-            nuevo_path = os.path.join(output_dir, nuevo_nombre)
+@st.cache_resource
+def obtener_cache_resultados():
+    """Caché de resultados compartida por todas las sesiones del servidor."""
+    return CacheResultados()
 
-            # Guardar nuevo PDF
-            doc_nuevo.save(nuevo_path)
-            doc_nuevo.close()
-            doc_original.close()
 
-            return nuevo_path
+def iniciar_trabajo(lector, uploaded_files, crear_zip, firma):
+    """Lanza el procesamiento de los archivos subidos en un hilo en segundo plano."""
+    archivos = [(file.name, file.getvalue()) for file in uploaded_files]
+    paginas_totales = sum(contar_paginas(datos_pdf) for _, datos_pdf in archivos)
+    trabajo = Trabajo(firma, paginas_totales)
+    # Con ZIP, cada resultado se comprime apenas se genera
+    trabajo.iniciar(lector.procesar_archivos, archivos, EscritorResultados(crear_zip))
+    return trabajo
 
-        except Exception as e:
-            st.error(f"Error al copiar PDF original: {str(e)}")
-            return None
 
-    def procesar_archivos(self, uploaded_files, output_dir):
-        """Procesa los archivos subidos."""
-        try:
-            if not uploaded_files:
-                st.warning("No se subieron archivos.")
-                return
-
-            st.info(f"Procesando {len(uploaded_files)} archivos...")
-
-            # Crear directorio de salida si no existe
-            os.makedirs(output_dir, exist_ok=True)
-
-            # Procesar cada archivo
-            for i, uploaded_file in enumerate(uploaded_files, 1):
-                # Guardar archivo temporalmente
-                with tempfile.NamedTemporaryFile(
-                    delete=False, suffix=".pdf"
-                ) as tmp_file:
-                    tmp_file.write(uploaded_file.getvalue())
-                    tmp_path = tmp_file.name
-
-                # Procesar el archivo usando el nombre original
-                nuevo_pdf = self.procesar_pdf_individual(
-                    tmp_path, i, output_dir, uploaded_file.name
-                )
-                if nuevo_pdf:
-                    self.pdfs_modificados.append(nuevo_pdf)
+def mostrar_informe(informe):
+    """Muestra los errores y el método de lectura de cada página de un archivo."""
+    for aviso in informe.avisos:
+        st.error(f"{informe.numero_orden}. {informe.nombre}: {aviso}")
+    if not informe.metodos:
+        return
 
-                # Limpiar archivo temporal
-                os.unlink(tmp_path)
+    # Informar qué método se usó en cada página
+    paginas_texto = informe.metodos.count("texto")
+    paginas_ocr = informe.metodos.count("ocr")
+    with st.expander(
+        f"📑 {informe.numero_orden}. {informe.nombre}: {len(informe.paginas_facturas)} "
+        f"páginas de facturas; {paginas_texto} por capa de texto, {paginas_ocr} por OCR"
+        + (" (resultado en caché)" if informe.desde_cache else "")
+    ):
+        for idx, metodo in enumerate(informe.metodos, 1):
+            st.write(
+                f"Página {idx}: {'capa de texto' if metodo == 'texto' else 'OCR'}"
+                + (" ✅ factura" if idx - 1 in informe.paginas_facturas else "")
+            )
 
-            st.success(
-                f"Procesamiento completado. Se crearon {len(self.pdfs_modificados)} archivos."
+
+def mostrar_tiempos(informes):
+    """Muestra en la barra lateral el tiempo por etapa, con el reporte por página."""
+    filas = []
+    for informe in informes:
+        filas.extend(
+            filas_tiempos(
+                informe.numero_orden,
+                informe.nombre,
+                informe.metodos,
+                informe.tiempos,
+                informe.paginas_facturas,
             )
+        )
+    if not filas:
+        return
 
-        except Exception as e:
-            st.error(f"Error al procesar archivos: {str(e)}")
+    st.sidebar.markdown("---")
+    st.sidebar.markdown("### ⏱️ Tiempos por etapa")
+    st.sidebar.dataframe(pd.DataFrame(resumen_tiempos(filas)), hide_index=True)
+    lecturas = resumen_lecturas(filas)
+    if any(veces > 1 for veces in lecturas):
+        st.sidebar.caption(
+            "Lecturas por página: "
+            + ", ".join(f"{paginas} con {veces}" for veces, paginas in lecturas.items())
+        )
+    st.sidebar.download_button(
+        "Descargar tiempos por página (CSV)",
+        data=tiempos_a_csv(filas),
+        file_name="tiempos.csv",
+        mime="text/csv",
+    )
+    st.sidebar.download_button(
+        "Descargar tiempos por página (JSON)",
+        data=tiempos_a_json(filas),
+        file_name="tiempos.json",
+        mime="application/json",
+    )
+
+
+def mostrar_trabajo(trabajo):
+    """Muestra el avance del trabajo mientras corre y los resultados al terminar.
+
+    Mientras el trabajo corre, la página se actualiza cada
+    `INTERVALO_ACTUALIZACION` segundos; tocar cualquier control corta esta
+    espera sin detener el trabajo.
+    """
+    st.subheader("⏳ Procesamiento")
+    barra = st.progress(0.0)
+    estado = st.empty()
+    while True:
+        hechas, totales, velocidad, restantes = trabajo.progreso()
+        barra.progress(min(hechas / totales, 1.0) if totales else 0.0)
+        texto = f"{hechas} de {totales} páginas · {velocidad:.1f} páginas/s"
+        if not trabajo.en_curso:
+            estado.caption(
+                f"{texto} · {formatear_duracion(trabajo.duracion())} en total"
+            )
+            break
+        if restantes is not None:
+            texto += f" · faltan ~{formatear_duracion(restantes)}"
+        estado.caption(f"{trabajo.archivo_actual or 'Preparando...'} — {texto}")
+        time.sleep(INTERVALO_ACTUALIZACION)
+
+    if trabajo.error:
+        st.error(f"Error al procesar archivos: {trabajo.error}")
+    for informe in trabajo.informes():
+        mostrar_informe(informe)
+    mostrar_tiempos(trabajo.informes())
+
+    escritor = trabajo.resultado
+    if escritor is None or not escritor.nombres:
+        st.warning("No se procesó ningún archivo.")
+        return
+
+    st.success(
+        f"Procesamiento completado. Se crearon {len(escritor.nombres)} archivos."
+    )
+    st.subheader("📥 Descargar Resultados")
+    if escritor.crear_zip:
+        # Botón para descargar ZIP
+        st.download_button(
+            label="📦 Descargar todos los archivos (ZIP)",
+            data=escritor.cerrar_zip(),
+            file_name="facturas_procesadas.zip",
+            mime="application/zip",
+        )
+    else:
+        # Botones individuales para cada archivo
+        st.write("Descargar archivos individuales:")
+        for nombre, contenido in escritor.archivos:
+            st.download_button(
+                label=f"📄 {nombre}",
+                data=contenido,
+                file_name=nombre,
+                mime="application/pdf",
+            )
 
 
 def main():
@@ -348,15 +536,94 @@ def main():
     """
     )
 
-    # Inicializar el lector
-    lector = LectorFacturas()
-
     # Sidebar para configuración
     st.sidebar.header("⚙️ Configuración")
 
     # Opción para descargar todos los archivos como ZIP
     crear_zip = st.sidebar.checkbox("Crear archivo ZIP con resultados", value=True)
 
+    # Empezar a procesar en segundo plano apenas se suben los archivos
+    procesar_al_subir = st.sidebar.checkbox(
+        "Procesar apenas se suben los archivos",
+        value=True,
+        help="El OCR empieza mientras revisas la lista de archivos, sin esperar al botón",
+    )
+
+    # Opción para leer el texto de PDFs digitales sin OCR
+    usar_capa_texto = st.sidebar.checkbox(
+        "Usar texto del PDF si existe (sin OCR)",
+        value=True,
+        help="Los PDFs digitales se leen directamente; solo se usa OCR en páginas escaneadas",
+    )
+
+    # Fracción superior de cada página que se analiza
+    fraccion_recorte = st.sidebar.slider(
+        "Fracción superior de la página a leer",
+        min_value=0.1,
+        max_value=1.0,
+        value=FRACCION_RECORTE,
+        step=0.05,
+        help="Solo se lee y se pasa por OCR esta parte de cada página",
+    )
+
+    # Preprocesamiento de las imágenes escaneadas antes del OCR
+    preprocesar = st.sidebar.checkbox(
+        "Limpiar imágenes escaneadas antes del OCR",
+        value=False,
+        help="Normaliza el contraste, binariza y recorta los bordes vacíos de cada región antes de pasarla por OCR",
+    )
+
+    # Motor de OCR: Tesseract solo o, si EasyOCR está instalado, en cascada
+    # (EasyOCR solo para las páginas que Tesseract lee con poca confianza)
+    motor_ocr = st.sidebar.selectbox(
+        "Motor de OCR",
+        ["tesseract", "cascada"] if easyocr_disponible() else ["tesseract"],
+        format_func=lambda motor: {
+            "tesseract": "Tesseract",
+            "cascada": "Tesseract + EasyOCR si hace falta",
+        }[motor],
+        help="En cascada, las páginas que Tesseract lee con poca confianza se vuelven a leer con EasyOCR (más lento, más robusto)",
+    )
+
+    # Lectura escalonada: pasada rápida y más lectura solo para las indecisas
+    escalonada = st.sidebar.checkbox(
+        "Lectura escalonada (pasada rápida primero)",
+        value=False,
+        help="Cada página se lee primero con una región más chica y menos resolución; solo las que quedan sin decidir se vuelven a leer con la fracción elegida y, si esa región está casi vacía, completas",
+    )
+
+    # Procesos para procesar varios archivos a la vez
+    workers = st.sidebar.number_input(
+        "Procesos en paralelo",
+        min_value=1,
+        max_value=workers_disponibles(),
+        value=1,
+        help="Cantidad de archivos que se procesan a la vez (uno por núcleo)",
+    )
+
+    # Caché de OCR compartida por todas las ejecuciones
+    if st.sidebar.button(
+        "🗑️ Vaciar caché de OCR",
+        help="Los PDFs ya leídos se vuelven a leer con OCR la próxima vez",
+    ):
+        CacheOCR().invalidar()
+        st.sidebar.success("Caché de OCR vaciada")
+
+    # Contador de aciertos de la caché de resultados (se completa al final)
+    cache_resultados = obtener_cache_resultados()
+    contador_cache = st.sidebar.empty()
+
+    # Inicializar el lector
+    lector = LectorFacturas(
+        usar_capa_texto=usar_capa_texto,
+        fraccion_recorte=fraccion_recorte,
+        preprocesar=preprocesar,
+        escalonada=escalonada,
+        workers=workers,
+        cache_resultados=cache_resultados,
+        motor_ocr=motor_ocr,
+    )
+
     st.sidebar.markdown("---")
     st.sidebar.markdown("### 📋 Instrucciones")
     st.sidebar.markdown(
@@ -385,47 +652,46 @@ def main():
         for i, file in enumerate(uploaded_files, 1):
             st.write(f"{i}. {file.name}")
 
-        # Botón para procesar
-        if st.button("🚀 Procesar Archivos", type="primary"):
-            # Crear directorio temporal para los resultados
-            with tempfile.TemporaryDirectory() as temp_dir:
-                # Procesar archivos
-                lector.procesar_archivos(uploaded_files, temp_dir)
-
-                if lector.pdfs_modificados:
-                    st.subheader("📥 Descargar Resultados")
-
-                    if crear_zip:
-                        # Crear archivo ZIP
-                        import zipfile
-
-                        zip_path = os.path.join(temp_dir, "facturas_procesadas.zip")
-
-                        with zipfile.ZipFile(zip_path, "w") as zipf:
-                            for pdf_path in lector.pdfs_modificados:
-                                zipf.write(pdf_path, os.path.basename(pdf_path))
-
-                        # Botón para descargar ZIP
-                        with open(zip_path, "rb") as f:
-                            st.download_button(
-                                label="📦 Descargar todos los archivos (ZIP)",
-                                data=f.read(),
-                                file_name="facturas_procesadas.zip",
-                                mime="application/zip",
-                            )
-                    else:
-                        # Botones individuales para cada archivo
-                        st.write("Descargar archivos individuales:")
-                        for pdf_path in lector.pdfs_modificados:
-                            with open(pdf_path, "rb") as f:
-                                st.download_button(
-                                    label=f"📄 {os.path.basename(pdf_path)}",
-                                    data=f.read(),
-                                    file_name=os.path.basename(pdf_path),
-                                    mime="application/pdf",
-                                )
-                else:
-                    st.warning("No se procesó ningún archivo.")
+        # El trabajo corre en segundo plano y queda en la sesión: sobrevive a
+        # los reruns y se vuelve a lanzar solo si cambian los archivos u opciones
+        firma = (
+            tuple((file.name, file.size) for file in uploaded_files),
+            (
+                crear_zip,
+                usar_capa_texto,
+                fraccion_recorte,
+                preprocesar,
+                escalonada,
+                motor_ocr,
+                workers,
+            ),
+        )
+        trabajo = st.session_state.get("trabajo")
+        mismo_trabajo = trabajo is not None and trabajo.firma == firma
+
+        # Botón para procesar (vuelve a procesar aunque ya haya resultados)
+        procesar = st.button("🚀 Procesar Archivos", type="primary")
+        if (procesar and not (mismo_trabajo and trabajo.en_curso)) or (
+            procesar_al_subir and not mismo_trabajo
+        ):
+            if trabajo is not None:
+                trabajo.cancelar()
+            trabajo = iniciar_trabajo(lector, uploaded_files, crear_zip, firma)
+            st.session_state.trabajo = trabajo
+            mismo_trabajo = True
+
+        if mismo_trabajo:
+            mostrar_trabajo(trabajo)
+    elif "trabajo" in st.session_state:
+        # Se quitaron los archivos: detener el trabajo y liberar sus resultados
+        st.session_state.trabajo.cancelar()
+        del st.session_state.trabajo
+
+    aciertos, consultas, archivos_guardados = cache_resultados.estadisticas()
+    contador_cache.caption(
+        f"♻️ Caché de resultados: {aciertos} de {consultas} archivos reutilizados "
+        f"({archivos_guardados} guardados)"
+    )
 
     # Footer
     st.markdown("---")
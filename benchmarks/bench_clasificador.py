@@ -0,0 +1,156 @@
+"""Mide aciertos y velocidad de implementaciones del clasificador de páginas.
+
+Uso:
+    python benchmarks/bench_clasificador.py [IMPLEMENTACIÓN ...]
+        [--corpus textos.jsonl] [--paginas N] [--ruido 0.02]
+        [--repeticiones N] [--exportar textos.jsonl] [--exigir-iguales]
+
+Cada implementación es "clasificador" (`ClasificadorFacturas`), "original"
+(`es_factura_original`) o "modulo:funcion" (una función que recibe el texto
+y devuelve True si la página es factura). Por defecto se comparan las dos
+primeras.
+
+El corpus es un archivo JSON lines con {"texto": ..., "es_factura": ...} y,
+opcionalmente, "tipo" por línea (por ejemplo, textos de OCR reales revisados a
+mano). Sin --corpus se generan páginas sintéticas con errores de OCR al azar
+(ver `corpus_sintetico.py`); --exportar las guarda para completarlas o
+corregirlas. Se informa precisión, recall, µs por página y, por tipo de página,
+los errores; con dos o más implementaciones, en qué páginas deciden distinto.
+Con --exigir-iguales termina con código 1 si alguna decisión difiere de la
+primera implementación.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clasificador import ClasificadorFacturas, es_factura_original  # noqa: E402
+from corpus_sintetico import textos_etiquetados  # noqa: E402
+
+
+def cargar_implementacion(nombre):
+    """Función texto -> es_factura a partir de su nombre."""
+    if nombre == "clasificador":
+        return ClasificadorFacturas().es_factura
+    if nombre == "original":
+        return es_factura_original
+    modulo, _, funcion = nombre.partition(":")
+    if not funcion:
+        raise SystemExit(f"Implementación desconocida: {nombre}")
+    return getattr(importlib.import_module(modulo), funcion)
+
+
+def cargar_corpus(ruta):
+    """Lee el corpus JSON lines y devuelve [(tipo, texto, es_factura)]."""
+    corpus = []
+    with open(ruta, encoding="utf-8") as archivo:
+        for linea in archivo:
+            if linea.strip():
+                pagina = json.loads(linea)
+                corpus.append(
+                    (pagina.get("tipo", "-"), pagina["texto"], pagina["es_factura"])
+                )
+    return corpus
+
+
+def medir(funcion, textos, repeticiones):
+    """Devuelve (decisiones, µs por página) con la mejor de las repeticiones."""
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        decisiones = [funcion(texto) for texto in textos]
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return decisiones, mejor / len(textos) * 1e6
+
+
+def metricas(decisiones, etiquetas):
+    """Devuelve (precisión, recall, exactitud) tomando "es factura" como positivo."""
+    vp = sum(d and e for d, e in zip(decisiones, etiquetas))
+    fp = sum(d and not e for d, e in zip(decisiones, etiquetas))
+    fn = sum(not d and e for d, e in zip(decisiones, etiquetas))
+    aciertos = sum(d == e for d, e in zip(decisiones, etiquetas))
+    precision = vp / (vp + fp) if vp + fp else 1.0
+    recall = vp / (vp + fn) if vp + fn else 1.0
+    return precision, recall, aciertos / len(etiquetas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "implementaciones", nargs="*", default=["clasificador", "original"]
+    )
+    parser.add_argument("--corpus", help="JSON lines con textos etiquetados")
+    parser.add_argument("--paginas", type=int, default=2000, help="páginas sintéticas")
+    parser.add_argument(
+        "--ruido", type=float, default=0.02, help="tasa de errores de OCR simulados"
+    )
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--exportar", help="guardar el corpus usado en JSON lines")
+    parser.add_argument(
+        "--exigir-iguales",
+        action="store_true",
+        help="código 1 si alguna implementación decide distinto que la primera",
+    )
+    args = parser.parse_args()
+
+    if args.corpus:
+        corpus = cargar_corpus(args.corpus)
+    else:
+        corpus = textos_etiquetados(args.paginas, args.ruido, args.semilla)
+    if args.exportar:
+        with open(args.exportar, "w", encoding="utf-8") as archivo:
+            for tipo, texto, es_factura in corpus:
+                pagina = {"tipo": tipo, "texto": texto, "es_factura": es_factura}
+                archivo.write(json.dumps(pagina, ensure_ascii=False) + "\n")
+
+    tipos = [tipo for tipo, _, _ in corpus]
+    textos = [texto for _, texto, _ in corpus]
+    etiquetas = [es_factura for _, _, es_factura in corpus]
+    print(f"{len(corpus)} páginas, {sum(etiquetas)} facturas")
+
+    resultados = []
+    print(
+        f"{'implementación':28} {'precisión':>10} {'recall':>8} {'exactitud':>10} {'µs/pág':>9}"
+    )
+    for nombre in args.implementaciones:
+        decisiones, us = medir(cargar_implementacion(nombre), textos, args.repeticiones)
+        precision, recall, exactitud = metricas(decisiones, etiquetas)
+        print(
+            f"{nombre[:28]:28} {precision:10.4f} {recall:8.4f} {exactitud:10.4f} {us:9.2f}"
+        )
+        resultados.append((nombre, decisiones))
+
+    print("\nErrores por tipo de página:")
+    for nombre, decisiones in resultados:
+        errores = Counter(
+            tipo for tipo, d, e in zip(tipos, decisiones, etiquetas) if d != e
+        )
+        detalle = ", ".join(f"{tipo}={n}" for tipo, n in sorted(errores.items()))
+        print(f"  {nombre}: {detalle or 'ninguno'}")
+
+    distintas_total = 0
+    referencia, decisiones_ref = resultados[0]
+    for nombre, decisiones in resultados[1:]:
+        distintas = [
+            i for i, (a, b) in enumerate(zip(decisiones_ref, decisiones)) if a != b
+        ]
+        distintas_total += len(distintas)
+        print(f"\n{referencia} vs {nombre}: {len(distintas)} decisiones distintas")
+        for i in distintas[:5]:
+            texto = " | ".join(textos[i].splitlines()[:3])
+            print(f"  [{tipos[i]}] {referencia}={decisiones_ref[i]}: {texto[:100]}")
+
+    if args.exigir_iguales and distintas_total:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
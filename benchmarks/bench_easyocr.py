@@ -0,0 +1,121 @@
+"""Compara los modos de EasyOCR en CPU: velocidad y coincidencia del texto.
+
+Uso:
+    python benchmarks/bench_easyocr.py [--paginas N] [--dpi-escaneo 300]
+        [--fraccion 0.25] [--hilos 1 4 ...]
+
+Renderiza la región superior de páginas escaneadas del corpus sintético (ver
+`corpus_sintetico.py`) igual que la aplicación y las lee con EasyOCR en CPU
+en tres modos: pesos en float32 con detector, pesos cuantizados a int8 con
+detector (lo que usa la aplicación por defecto) e int8 sin detector
+(`ocr_easyocr_renglones`). Cada modo se mide con cada cantidad de hilos de
+torch de --hilos. Se informa ms/página, páginas/s, la coincidencia del texto
+con el de float32 con detector (1.0 = idéntico) y la similitud con el texto
+real de la página.
+"""
+
+import argparse
+import difflib
+import os
+import sys
+import time
+
+import fitz  # PyMuPDF
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus_sintetico import crear_pdf, paginas_sinteticas  # noqa: E402
+from extraccion import (  # noqa: E402
+    FRACCION_RECORTE,
+    extraer_texto_capa,
+    renderizar_region,
+)
+from motores_ocr import (  # noqa: E402
+    configurar_hilos_torch,
+    easyocr_disponible,
+    hilos_torch_por_proceso,
+    obtener_reader_easyocr,
+    ocr_easyocr,
+    ocr_easyocr_renglones,
+)
+
+# Modos que se comparan: (etiqueta, cuantizar, función de OCR). El primero es
+# la referencia para la coincidencia del texto
+MODOS = [
+    ("float32 con detector", False, ocr_easyocr),
+    ("int8 con detector", True, ocr_easyocr),
+    ("int8 sin detector", True, ocr_easyocr_renglones),
+]
+
+
+def normalizar(texto):
+    return " ".join(texto.lower().split())
+
+
+def similitud(textos, referencias):
+    """Similitud media (0-1) entre cada texto y su referencia."""
+    return sum(
+        difflib.SequenceMatcher(None, normalizar(texto), normalizar(ref)).ratio()
+        for texto, ref in zip(textos, referencias)
+    ) / len(textos)
+
+
+def medir(ocr, reader, pixmaps):
+    """Devuelve (textos, segundos) de leer todos los pixmaps con `ocr`."""
+    # Una lectura previa para que la primera página no pague la inicialización
+    ocr(pixmaps[0], reader)
+    inicio = time.perf_counter()
+    textos = [ocr(pix, reader) for pix in pixmaps]
+    return textos, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paginas", type=int, default=20)
+    parser.add_argument("--fraccion", type=float, default=FRACCION_RECORTE)
+    parser.add_argument(
+        "--dpi-escaneo", type=int, default=300, help="resolución de los escaneos"
+    )
+    parser.add_argument(
+        "--hilos",
+        type=int,
+        nargs="+",
+        default=sorted({1, hilos_torch_por_proceso()}),
+        help="cantidades de hilos de torch a medir",
+    )
+    args = parser.parse_args()
+
+    if not easyocr_disponible():
+        print("EasyOCR no está instalado.", file=sys.stderr)
+        return 1
+
+    paginas = paginas_sinteticas(args.paginas)
+    digital = fitz.open(stream=crear_pdf(paginas), filetype="pdf")
+    textos_reales = [extraer_texto_capa(pagina, args.fraccion) for pagina in digital]
+    escaneado = fitz.open(
+        stream=crear_pdf(paginas, escaneado=True, dpi=args.dpi_escaneo),
+        filetype="pdf",
+    )
+    pixmaps = [renderizar_region(pagina, args.fraccion) for pagina in escaneado]
+
+    print(
+        f"{'modo':24} {'hilos':>5} {'ms/página':>10} {'págs/s':>8} "
+        f"{'coincidencia':>12} {'similitud':>10}"
+    )
+    for hilos in args.hilos:
+        configurar_hilos_torch(hilos)
+        referencia = None
+        for etiqueta, cuantizar, ocr in MODOS:
+            textos, segundos = medir(ocr, obtener_reader_easyocr(cuantizar), pixmaps)
+            if referencia is None:
+                referencia = textos
+            print(
+                f"{etiqueta:24} {hilos:5d} {segundos / len(pixmaps) * 1000:10.1f} "
+                f"{len(pixmaps) / segundos:8.2f} {similitud(textos, referencia):12.3f} "
+                f"{similitud(textos, textos_reales):10.3f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+"""Mide el procesamiento completo sobre un corpus sintético, etapa por etapa.
+
+Uso:
+    python benchmarks/bench_pipeline.py [--documentos N] [--paginas N]
+        [--motor tesseract] [--tesseract-cmd RUTA] [--escalonada]
+        [--guardar base.json] [--comparar base.json] [--tolerancia 0.2]
+
+Genera PDFs digitales y escaneados con facturas, remitos y emails (ver
+`corpus_sintetico.py`) y mide, con las mismas funciones que usa la aplicación,
+cada etapa: capa de texto, renderizado, OCR, clasificación, PDF de salida y
+ZIP. Después procesa el mismo corpus de punta a punta con `LectorFacturas`
+(sin caché). Informa páginas/s por etapa, el pico de memoria del proceso y
+cuántas páginas se clasificaron bien. Con --escalonada, `LectorFacturas` usa
+la lectura escalonada y se informa cuántas veces se leyó cada página.
+
+Con --guardar se escriben los resultados en JSON; con --comparar se comparan
+contra un JSON guardado antes y se termina con código 1 si alguna etapa quedó
+más lenta que la tolerancia (por defecto, 20 %). Sin Tesseract disponible, el
+corpus se arma solo con PDFs digitales.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clasificador import clasificador  # noqa: E402
+from corpus_sintetico import crear_corpus  # noqa: E402
+from extraccion import (  # noqa: E402
+    FRACCION_RECORTE,
+    leer_capa_texto,
+    renderizar_region,
+)
+from lector import LectorFacturas, filas_tiempos_informes  # noqa: E402
+from motores_ocr import MOTORES_OCR, configurar_tesseract  # noqa: E402
+from resultados import EscritorResultados, pdf_con_paginas  # noqa: E402
+from tiempos import resumen_lecturas  # noqa: E402
+
+ETAPAS = ["capa de texto", "render", "ocr", "clasificación", "salida", "zip"]
+
+
+def pico_memoria_mb():
+    """Pico de memoria residente del proceso en MB (None si no se puede medir)."""
+    if resource is None:
+        return None
+    # En Linux ru_maxrss está en KB (en macOS, en bytes)
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / 1e6 if sys.platform == "darwin" else pico / 1e3
+
+
+def ocr_disponible(ocr):
+    """True si el motor de OCR funciona (por ejemplo, si Tesseract está instalado)."""
+    doc = fitz.open()
+    pagina = doc.new_page(width=200, height=60)
+    pagina.insert_text((10, 30), "FACTURA")
+    try:
+        ocr(renderizar_region(pagina, 1.0))
+        return True
+    except Exception as e:
+        print(f"OCR no disponible ({e}); solo PDFs digitales.", file=sys.stderr)
+        return False
+    finally:
+        doc.close()
+
+
+def medir_etapas(rutas, ocr, fraccion):
+    """Procesa los PDFs etapa por etapa y devuelve (tiempos, páginas, decisiones).
+
+    `tiempos` y `páginas` tienen, por etapa, los segundos y las páginas que
+    pasaron por ella; `decisiones` es la lista de es_factura de cada página.
+    """
+    tiempos = dict.fromkeys(ETAPAS, 0.0)
+    paginas = dict.fromkeys(ETAPAS, 0)
+    decisiones = []
+    escritor = EscritorResultados(crear_zip=True)
+    for numero, ruta in enumerate(rutas, 1):
+        with open(ruta, "rb") as archivo:
+            datos = archivo.read()
+        doc = fitz.open(stream=datos, filetype="pdf")
+        facturas = []
+        for idx, pagina in enumerate(doc):
+            inicio = time.perf_counter()
+            texto = leer_capa_texto(pagina, True, fraccion)
+            tiempos["capa de texto"] += time.perf_counter() - inicio
+            paginas["capa de texto"] += 1
+            if texto is None:
+                inicio = time.perf_counter()
+                pix = renderizar_region(pagina, fraccion)
+                medio = time.perf_counter()
+                texto = ocr(pix)
+                fin = time.perf_counter()
+                tiempos["render"] += medio - inicio
+                tiempos["ocr"] += fin - medio
+                paginas["render"] += 1
+                paginas["ocr"] += 1
+
+            inicio = time.perf_counter()
+            es_factura = clasificador.clasificar(texto).es_factura
+            tiempos["clasificación"] += time.perf_counter() - inicio
+            paginas["clasificación"] += 1
+            decisiones.append(es_factura)
+            if es_factura:
+                facturas.append(idx)
+
+        # `pdf_con_paginas` deja en `doc` solo las páginas de facturas
+        total_paginas = len(doc)
+        inicio = time.perf_counter()
+        if facturas and len(facturas) < total_paginas:
+            salida = pdf_con_paginas(doc, facturas)
+        else:
+            salida = datos
+        medio = time.perf_counter()
+        escritor.agregar(f"{numero:03d}_{os.path.basename(ruta)}", salida)
+        tiempos["salida"] += medio - inicio
+        tiempos["zip"] += time.perf_counter() - medio
+        paginas["salida"] += total_paginas
+        paginas["zip"] += total_paginas
+        doc.close()
+
+    inicio = time.perf_counter()
+    escritor.cerrar_zip()
+    tiempos["zip"] += time.perf_counter() - inicio
+    return tiempos, paginas, decisiones
+
+
+def medir_lector(rutas, motor, fraccion, escalonada=False):
+    """Procesa los PDFs con `LectorFacturas` y devuelve (segundos, páginas, lecturas).
+
+    `lecturas` es {veces que se leyó: páginas} (ver `resumen_lecturas`).
+    """
+    with tempfile.TemporaryDirectory() as salida:
+        lector = LectorFacturas(
+            fraccion_recorte=fraccion,
+            escalonada=escalonada,
+            usar_cache_ocr=False,
+            motor_ocr=motor,
+            directorio_salida=salida,
+        )
+        inicio = time.perf_counter()
+        lector.procesar_pdfs(rutas)
+        segundos = time.perf_counter() - inicio
+    paginas = sum(informe["paginas"] for informe in lector.informes)
+    return segundos, paginas, resumen_lecturas(filas_tiempos_informes(lector.informes))
+
+
+def comparar(resultados, base, tolerancia):
+    """Devuelve las etapas cuyas páginas/s cayeron más que la tolerancia."""
+    regresiones = []
+    for etapa, velocidad in resultados["paginas_por_segundo"].items():
+        anterior = base["paginas_por_segundo"].get(etapa)
+        if anterior and velocidad < anterior * (1 - tolerancia):
+            regresiones.append((etapa, anterior, velocidad))
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documentos", type=int, default=8)
+    parser.add_argument("--paginas", type=int, default=10, help="páginas por PDF")
+    parser.add_argument(
+        "--motor", choices=sorted(MOTORES_OCR), default="tesseract", help="motor de OCR"
+    )
+    parser.add_argument("--tesseract-cmd", default="tesseract")
+    parser.add_argument("--fraccion", type=float, default=FRACCION_RECORTE)
+    parser.add_argument(
+        "--escalonada",
+        action="store_true",
+        help="usar la lectura escalonada en LectorFacturas",
+    )
+    parser.add_argument("--guardar", help="archivo JSON donde guardar los resultados")
+    parser.add_argument("--comparar", help="archivo JSON de una corrida anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.2)
+    args = parser.parse_args()
+
+    configurar_tesseract(args.tesseract_cmd)
+    ocr = MOTORES_OCR[args.motor]
+    con_ocr = ocr_disponible(ocr)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        corpus = crear_corpus(carpeta, args.documentos, args.paginas, con_ocr)
+        rutas = [ruta for ruta, _, _ in corpus]
+        etiquetas = [etiqueta for _, _, pagina in corpus for etiqueta in pagina]
+
+        tiempos, paginas, decisiones = medir_etapas(rutas, ocr, args.fraccion)
+        segundos_lector, paginas_lector, lecturas = medir_lector(
+            rutas, args.motor, args.fraccion, args.escalonada
+        )
+
+    velocidades = {
+        etapa: paginas[etapa] / tiempos[etapa]
+        for etapa in ETAPAS
+        if paginas[etapa] and tiempos[etapa]
+    }
+    total = sum(tiempos.values())
+    velocidades["total por etapas"] = paginas["capa de texto"] / total
+    velocidades["LectorFacturas"] = paginas_lector / segundos_lector
+    aciertos = sum(d == e for d, e in zip(decisiones, etiquetas))
+    resultados = {
+        "documentos": len(rutas),
+        "paginas": paginas["capa de texto"],
+        "paginas_ocr": paginas["ocr"],
+        "segundos": {etapa: round(tiempos[etapa], 4) for etapa in ETAPAS},
+        "paginas_por_segundo": {k: round(v, 2) for k, v in velocidades.items()},
+        "pico_memoria_mb": pico_memoria_mb(),
+        "aciertos": aciertos,
+        "lecturas": lecturas,
+    }
+
+    print(
+        f"{resultados['documentos']} PDFs, {resultados['paginas']} páginas "
+        f"({resultados['paginas_ocr']} con OCR)"
+    )
+    print(
+        f"{'etapa':18} {'páginas':>8} {'segundos':>10} {'ms/página':>10} {'pág/s':>10}"
+    )
+    for etapa in ETAPAS:
+        if not paginas[etapa]:
+            continue
+        print(
+            f"{etapa:18} {paginas[etapa]:8d} {tiempos[etapa]:10.3f} "
+            f"{tiempos[etapa] / paginas[etapa] * 1000:10.3f} "
+            f"{velocidades.get(etapa, float('inf')):10.1f}"
+        )
+    print(
+        f"{'total por etapas':18} {'':8} {total:10.3f} {'':10} "
+        f"{velocidades['total por etapas']:10.1f}"
+    )
+    print(
+        f"{'LectorFacturas':18} {paginas_lector:8d} {segundos_lector:10.3f} {'':10} "
+        f"{velocidades['LectorFacturas']:10.1f}"
+    )
+    if resultados["pico_memoria_mb"] is not None:
+        print(f"Pico de memoria: {resultados['pico_memoria_mb']:.1f} MB")
+    print(f"Clasificación: {aciertos}/{len(etiquetas)} páginas bien")
+    if args.escalonada:
+        detalle = ", ".join(f"{n} con {veces}" for veces, n in lecturas.items())
+        print(f"Lecturas por página: {detalle}")
+
+    if args.guardar:
+        with open(args.guardar, "w", encoding="utf-8") as archivo:
+            json.dump(resultados, archivo, ensure_ascii=False, indent=2)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            base = json.load(archivo)
+        regresiones = comparar(resultados, base, args.tolerancia)
+        for etapa, anterior, velocidad in regresiones:
+            print(
+                f"REGRESIÓN {etapa}: {anterior:.1f} -> {velocidad:.1f} pág/s",
+                file=sys.stderr,
+            )
+        if regresiones:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Compara renderizar la página completa y recortar contra renderizar solo la región.
+
+Uso:
+    python benchmarks/bench_recorte.py [archivo.pdf ...] [--repeticiones N]
+
+Sin archivos se genera un PDF sintético de varias páginas.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraccion import (  # noqa: E402
+    FRACCION_RECORTE,
+    pixmap_a_array,
+    renderizar_region,
+)
+
+# Zoom fijo con el que se renderizaba la página completa
+ZOOM_ANTERIOR = 2.0
+
+
+def crear_pdf_sintetico(paginas=10):
+    """Genera un PDF en memoria con encabezado de factura en cada página."""
+    doc = fitz.open()
+    for i in range(paginas):
+        pagina = doc.new_page(width=595, height=842)  # A4
+        pagina.insert_text((50, 60), "FACTURA N°: 0003-%08d" % (i + 1), fontsize=16)
+        pagina.insert_text((50, 90), "AMX ARGENTINA S.A - CUIT 30-12345678-9")
+        for linea in range(40):
+            pagina.insert_text((50, 140 + linea * 16), "Detalle de consumo %d" % linea)
+    return doc
+
+
+def render_completo_y_recorte(pagina, fraccion_recorte):
+    """Camino anterior: página completa a 2x, copia a PIL y recorte."""
+    pix = pagina.get_pixmap(matrix=fitz.Matrix(ZOOM_ANTERIOR, ZOOM_ANTERIOR))
+    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    altura_procesar = int(img.height * fraccion_recorte)
+    img_recortada = img.crop((0, 0, img.width, altura_procesar))
+    return pix.width * pix.height * pix.n, img_recortada
+
+
+def render_region(pagina, fraccion_recorte):
+    """Camino nuevo: solo la región con clip, sin copia intermedia."""
+    pix = renderizar_region(pagina, fraccion_recorte)
+    return pix.width * pix.height * pix.n, pixmap_a_array(pix)
+
+
+def medir(doc, funcion, fraccion_recorte, repeticiones):
+    bytes_totales = 0
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for pagina in doc:
+            bytes_pagina, _ = funcion(pagina, fraccion_recorte)
+            bytes_totales += bytes_pagina
+    segundos = time.perf_counter() - inicio
+    paginas = len(doc) * repeticiones
+    return segundos / paginas * 1000, bytes_totales / paginas / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pdfs", nargs="*", help="PDFs a medir (por defecto, sintético)")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--fraccion", type=float, default=FRACCION_RECORTE)
+    args = parser.parse_args()
+
+    documentos = [(ruta, fitz.open(ruta)) for ruta in args.pdfs] or [
+        ("sintético", crear_pdf_sintetico())
+    ]
+
+    print(f"{'PDF':30} {'método':22} {'ms/página':>10} {'MB/página':>10}")
+    for nombre, doc in documentos:
+        for etiqueta, funcion in [
+            ("página completa+crop", render_completo_y_recorte),
+            ("clip de la región", render_region),
+        ]:
+            ms, mb = medir(doc, funcion, args.fraccion, args.repeticiones)
+            print(
+                f"{os.path.basename(nombre)[:30]:30} {etiqueta:22} {ms:10.2f} {mb:10.2f}"
+            )
+        doc.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Compara cómo se obtiene la imagen de la región antes del OCR.
+
+Uso:
+    python benchmarks/bench_render.py [--paginas N] [--repeticiones N]
+        [--dpi-escaneo 300] [--motor tesseract] [--tesseract-cmd RUTA] [--sin-ocr]
+
+Usa páginas escaneadas del corpus sintético (ver `corpus_sintetico.py`) y
+compara renderizar la región a zoom fijo en RGB y en grises, renderizarla con
+el zoom adaptado a la página (lo que usa la aplicación), recortarla de la
+imagen incrustada del escaneo sin renderizar y renderizarla con
+preprocesamiento. Para cada variante mide en ms/página cuánto tarda obtener la
+imagen (con el documento recién abierto, sin imágenes ya decodificadas en la
+memoria de PyMuPDF), los MB de imagen por página que se mueven y retienen
+hasta el OCR y, si el motor de OCR está disponible, el tiempo de OCR y la
+similitud del texto leído con el texto real de la página (1.0 = idéntico).
+"""
+
+import argparse
+import difflib
+import math
+import os
+import sys
+import time
+
+import fitz  # PyMuPDF
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus_sintetico import crear_pdf, paginas_sinteticas  # noqa: E402
+from extraccion import (  # noqa: E402
+    DPI_RENDER,
+    FRACCION_RECORTE,
+    extraer_texto_capa,
+    pixmap_a_array,
+    preprocesar_pixmap,
+    region_superior,
+    renderizar_region,
+)
+from motores_ocr import MOTORES_OCR, configurar_tesseract  # noqa: E402
+
+# Zoom fijo con el que se renderizaba la región antes de adaptarlo a la página
+ZOOM_ANTERIOR = 2.0
+
+
+def render_rgb(pagina, fraccion):
+    """La región en RGB (3 canales) a zoom fijo."""
+    return pagina.get_pixmap(
+        matrix=fitz.Matrix(ZOOM_ANTERIOR, ZOOM_ANTERIOR),
+        clip=region_superior(pagina, fraccion),
+        alpha=False,
+    )
+
+
+def render_gris(pagina, fraccion):
+    """La región en grises (1 canal) a zoom fijo."""
+    return renderizar_region(pagina, fraccion, ZOOM_ANTERIOR)
+
+
+def render_adaptivo(pagina, fraccion):
+    """La región en grises con el zoom elegido según el tamaño de la página."""
+    return renderizar_region(pagina, fraccion)
+
+
+def recorte_imagen_incrustada(pagina, fraccion):
+    """La región recortada de la imagen del escaneo, sin renderizar la página.
+
+    Decodifica la imagen completa, toma las filas de la región y, si tiene el
+    doble de resolución que DPI_RENDER o más, la reduce a la mitad las veces
+    que haga falta. Supone que la página es una sola imagen que la cubre.
+    """
+    imagen = pagina.get_images(full=True)[0]
+    bbox = pagina.get_image_bbox(imagen)
+    pix = fitz.Pixmap(pagina.parent, imagen[0])
+    if pix.n != 1:
+        pix = fitz.Pixmap(fitz.csGRAY, pix)
+    region = region_superior(pagina, fraccion)
+    abajo = min(math.ceil((region.y1 - bbox.y0) / bbox.height * pix.height), pix.height)
+    recorte = np.ascontiguousarray(pixmap_a_array(pix)[:abajo])
+    pix = fitz.Pixmap(fitz.csGRAY, pix.width, abajo, recorte.tobytes(), False)
+    reducciones = int(math.log2(pix.width / bbox.width * 72 / DPI_RENDER))
+    if reducciones > 0:
+        pix.shrink(reducciones)
+    return pix
+
+
+def render_preprocesado(pagina, fraccion):
+    """El render adaptivo más contraste, binarización y recorte de bordes con NumPy."""
+    return preprocesar_pixmap(renderizar_region(pagina, fraccion))
+
+
+def normalizar(texto):
+    return " ".join(texto.lower().split())
+
+
+def medir(datos, funcion, fraccion, repeticiones, ocr, textos_reales):
+    """Devuelve (ms/página de render, MB/página, ms/página de OCR, similitud)."""
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        # Vaciar la memoria de imágenes decodificadas de PyMuPDF, así cada
+        # variante paga la decodificación como en una corrida real
+        fitz.TOOLS.store_shrink(100)
+        doc = fitz.open(stream=datos, filetype="pdf")
+        inicio = time.perf_counter()
+        pixmaps = [funcion(pagina, fraccion) for pagina in doc]
+        mejor = min(mejor, time.perf_counter() - inicio)
+        doc.close()
+    paginas = len(pixmaps)
+    megabytes = sum(len(pix.samples_mv) for pix in pixmaps) / paginas / 1e6
+
+    if ocr is None:
+        return mejor / paginas * 1000, megabytes, None, None
+    inicio = time.perf_counter()
+    textos = [ocr(pix) for pix in pixmaps]
+    segundos_ocr = time.perf_counter() - inicio
+    similitud = sum(
+        difflib.SequenceMatcher(None, normalizar(leido), normalizar(real)).ratio()
+        for leido, real in zip(textos, textos_reales)
+    ) / len(textos)
+    return mejor / paginas * 1000, megabytes, segundos_ocr / paginas * 1000, similitud
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paginas", type=int, default=20)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--fraccion", type=float, default=FRACCION_RECORTE)
+    parser.add_argument(
+        "--dpi-escaneo", type=int, default=300, help="resolución de los escaneos"
+    )
+    parser.add_argument("--motor", choices=sorted(MOTORES_OCR), default="tesseract")
+    parser.add_argument("--tesseract-cmd", default="tesseract")
+    parser.add_argument("--sin-ocr", action="store_true", help="medir solo el render")
+    args = parser.parse_args()
+
+    paginas = paginas_sinteticas(args.paginas)
+    digital = fitz.open(stream=crear_pdf(paginas), filetype="pdf")
+    textos_reales = [extraer_texto_capa(pagina, args.fraccion) for pagina in digital]
+    escaneado = crear_pdf(paginas, escaneado=True, dpi=args.dpi_escaneo)
+
+    ocr = None
+    if not args.sin_ocr:
+        configurar_tesseract(args.tesseract_cmd)
+        ocr = MOTORES_OCR[args.motor]
+        try:
+            with fitz.open(stream=escaneado, filetype="pdf") as doc:
+                ocr(render_adaptivo(doc[0], args.fraccion))
+        except Exception as e:
+            print(f"OCR no disponible ({e}); solo se mide el render.", file=sys.stderr)
+            ocr = None
+
+    print(
+        f"{'variante':24} {'ms render':>10} {'MB/página':>10} "
+        f"{'ms OCR':>10} {'similitud':>10}"
+    )
+    for etiqueta, funcion in [
+        ("render RGB 2x", render_rgb),
+        ("render grises 2x", render_gris),
+        ("render adaptivo", render_adaptivo),
+        ("imagen incrustada", recorte_imagen_incrustada),
+        ("adaptivo + preproceso", render_preprocesado),
+    ]:
+        ms, mb, ms_ocr, similitud = medir(
+            escaneado, funcion, args.fraccion, args.repeticiones, ocr, textos_reales
+        )
+        columnas_ocr = (
+            f"{ms_ocr:10.1f} {similitud:10.3f}"
+            if ms_ocr is not None
+            else f"{'-':>10} {'-':>10}"
+        )
+        print(f"{etiqueta:24} {ms:10.2f} {mb:10.3f} {columnas_ocr}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Compara las formas de generar el PDF de salida (páginas filtradas y copia).
+
+Uso:
+    python benchmarks/bench_salida.py [archivo.pdf ...] [--repeticiones N]
+
+Sin archivos se genera un PDF sintético con una imagen escaneada por página.
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+import fitz  # PyMuPDF
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resultados import pdf_con_paginas  # noqa: E402
+
+
+def crear_pdf_sintetico(paginas=40):
+    """Genera un PDF en memoria con una imagen JPEG de página completa en cada página."""
+    rng = np.random.default_rng(0)
+    doc = fitz.open()
+    for _ in range(paginas):
+        pagina = doc.new_page(width=595, height=842)  # A4
+        pixeles = (rng.random((1100, 780, 3)) * 255).astype(np.uint8)
+        imagen = io.BytesIO()
+        Image.fromarray(pixeles).save(imagen, "JPEG", quality=80)
+        pagina.insert_image(pagina.rect, stream=imagen.getvalue())
+    datos = doc.tobytes()
+    doc.close()
+    return datos
+
+
+def paginas_filtradas(total):
+    """Simula el resultado de la clasificación: 7 de cada 10 páginas."""
+    return [idx for idx in range(total) if idx % 10 < 7]
+
+
+def insertar_por_pagina(datos, paginas):
+    """Camino anterior: un insert_pdf por página en un documento nuevo."""
+    doc = fitz.open(stream=datos, filetype="pdf")
+    doc_nuevo = fitz.open()
+    for pagina_idx in paginas:
+        doc_nuevo.insert_pdf(doc, from_page=pagina_idx, to_page=pagina_idx)
+    return doc_nuevo.tobytes()
+
+
+def seleccionar(datos, paginas):
+    """Camino nuevo: select sobre el documento abierto (garbage=1)."""
+    doc = fitz.open(stream=datos, filetype="pdf")
+    return pdf_con_paginas(doc, paginas)
+
+
+def copiar_reescribiendo(datos, paginas):
+    """Copia anterior: insertar todas las páginas y volver a guardar."""
+    doc = fitz.open(stream=datos, filetype="pdf")
+    doc_nuevo = fitz.open()
+    doc_nuevo.insert_pdf(doc)
+    return doc_nuevo.tobytes()
+
+
+def copiar_bytes(datos, paginas):
+    """Copia nueva: el mismo contenido, byte por byte."""
+    return datos
+
+
+def medir(datos, funcion, paginas, repeticiones):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        salida = funcion(datos, paginas)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor * 1000, len(salida) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pdfs", nargs="*", help="PDFs a medir (por defecto, sintético)")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    documentos = [(ruta, open(ruta, "rb").read()) for ruta in args.pdfs] or [
+        ("sintético", crear_pdf_sintetico())
+    ]
+
+    print(f"{'PDF':30} {'método':24} {'ms':>10} {'MB salida':>10}")
+    for nombre, datos in documentos:
+        with fitz.open(stream=datos, filetype="pdf") as doc:
+            paginas = paginas_filtradas(len(doc))
+        for etiqueta, funcion in [
+            ("filtrar: insert por pág.", insertar_por_pagina),
+            ("filtrar: select", seleccionar),
+            ("copia: reescribir", copiar_reescribiendo),
+            ("copia: bytes", copiar_bytes),
+        ]:
+            ms, mb = medir(datos, funcion, paginas, args.repeticiones)
+            print(
+                f"{os.path.basename(nombre)[:30]:30} {etiqueta:24} {ms:10.2f} {mb:10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
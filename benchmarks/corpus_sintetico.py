@@ -0,0 +1,281 @@
+"""Corpus sintético de páginas etiquetadas para los benchmarks.
+
+Genera los tipos de página que distingue `es_factura` (facturas con y sin la
+palabra "factura", facturas de proveedores conocidos, remitos, emails impresos,
+presupuestos "no válidos como factura") y páginas sin evidencia ni a favor ni
+en contra (hojas de continuación de un detalle, cláusulas de un contrato), y arma PDFs digitales (con capa de
+texto) o escaneados (una imagen por página, sin texto). Todo es determinístico
+a partir de la semilla, así las mediciones se pueden comparar entre corridas.
+
+Uso:
+    python benchmarks/corpus_sintetico.py CARPETA [--documentos N] [--paginas N]
+"""
+
+import argparse
+import io
+import os
+import random
+
+import fitz  # PyMuPDF
+import numpy as np
+from PIL import Image
+
+# Resolución con la que se "escanean" las páginas de los PDFs escaneados
+DPI_ESCANEO = 150
+
+# Confusiones típicas del OCR (carácter -> lectura errónea), para simular
+# textos escaneados sin pasar por el OCR ("como" -> "cowo", "N°" -> "Nº", ...)
+CONFUSIONES_OCR = {
+    "m": "w",
+    "o": "0",
+    "l": "1",
+    "i": "í",
+    "°": "º",
+    "S": "5",
+    ".": ",",
+    " ": "",
+}
+
+PROVEEDORES = [
+    "DISTRIBUIDORA DEL SUR S.R.L.",
+    "FERRETERIA INDUSTRIAL ROCA S.A.",
+    "LIMPIEZA TOTAL S.A.",
+    "SERVICIOS GRAFICOS DEL PLATA S.R.L.",
+]
+NOMBRES = ["Juan Perez", "Maria Gomez", "Carlos Diaz", "Laura Fernandez"]
+
+
+def _cuit(rng):
+    return f"30-{rng.randint(10000000, 99999999)}-{rng.randint(0, 9)}"
+
+
+def _fecha(rng):
+    return f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2024"
+
+
+def _detalle(rng, lineas=12):
+    return [
+        f"{rng.randint(1, 20)} x Articulo {rng.randint(100, 999)}   "
+        f"${rng.randint(100, 99999)},{rng.randint(0, 99):02d}"
+        for _ in range(lineas)
+    ]
+
+
+def factura(rng):
+    return [
+        rng.choice(PROVEEDORES),
+        f"FACTURA N°: {rng.randint(1, 9):04d}-{rng.randint(1, 99999999):08d}",
+        f"CUIT: {_cuit(rng)}   Fecha: {_fecha(rng)}",
+        "Condicion frente al IVA: Responsable Inscripto",
+    ] + _detalle(rng)
+
+
+def factura_codigo(rng):
+    # Comprobante sin la palabra "factura": lo detectan los patrones
+    return [
+        rng.choice(PROVEEDORES),
+        f"Punto de Venta: {rng.randint(1, 9):05d} Comp.Nro: {rng.randint(1, 99999):08d}",
+        f"COD. {rng.choice(['01', '06', '11'])}   Fecha de Emision: {_fecha(rng)}",
+        f"CUIT: {_cuit(rng)}",
+    ] + _detalle(rng)
+
+
+def factura_proveedor(rng):
+    return [
+        rng.choice(
+            [
+                "EMPRESA DISTRIBUIDORA Y COMERCIALIZADORA NORTE S.A.",
+                "AMX ARGENTINA S.A",
+            ]
+        ),
+        f"Cliente N° {rng.randint(1000000, 9999999)}   Periodo: {_fecha(rng)}",
+        f"Total a pagar: ${rng.randint(1000, 99999)},00",
+    ] + _detalle(rng, 8)
+
+
+def remito(rng):
+    return [
+        rng.choice(PROVEEDORES),
+        f"REMITO N° {rng.randint(1, 9):04d}-{rng.randint(1, 99999999):08d}",
+        f"Orden de compra: {rng.randint(1000, 9999)}   Fecha: {_fecha(rng)}",
+        "Documento no valido como factura",
+    ] + _detalle(rng)
+
+
+def presupuesto(rng):
+    return [
+        rng.choice(PROVEEDORES),
+        f"PRESUPUESTO N° {rng.randint(1, 99999)}   Fecha: {_fecha(rng)}",
+        "Validez de la oferta: 15 dias",
+        "No valido como factura",
+    ] + _detalle(rng)
+
+
+def email(rng):
+    nombre = rng.choice(NOMBRES)
+    return [
+        f"{_fecha(rng)}, {rng.randint(8, 18)}:{rng.randint(0, 59):02d}   "
+        f"Correo de {nombre.split()[0]} - Fwd: Pedido de materiales",
+        f"De: {nombre} <{nombre.split()[0].lower()}@empresa.com.ar>",
+        "Para: compras@empresa.com.ar",
+        "Asunto: Fwd: Pedido de materiales",
+        "Buenos dias, les reenvio el pedido de la semana.",
+        f"{rng.randint(1, 5)} mensajes",
+    ]
+
+
+def email_factura(rng):
+    nombre = rng.choice(NOMBRES)
+    return [
+        f"Re: factura {rng.randint(1000, 9999)}",
+        f"Enviado por {nombre}",
+        "Hola, quedamos a la espera para realizar la factura correspondiente.",
+        "Saludos.",
+    ]
+
+
+def continuacion(rng):
+    # Hoja siguiente de un detalle largo: ninguna regla encuentra nada
+    return [f"Hoja {rng.randint(2, 5)} de {rng.randint(5, 9)}"] + _detalle(rng, 16)
+
+
+def contrato(rng):
+    return [
+        f"CLAUSULA {rng.choice(['SEGUNDA', 'TERCERA', 'CUARTA', 'QUINTA'])}: "
+        "Plazo y condiciones",
+        "Las partes acuerdan que el servicio se prestara durante el plazo de",
+        f"{rng.randint(6, 36)} meses contados desde la firma del presente, pudiendo",
+        "renovarse por periodos iguales salvo comunicacion en contrario con",
+        f"{rng.randint(30, 90)} dias de anticipacion. El precio se actualizara segun",
+        "el indice acordado y se abonara dentro de los diez dias de cada mes.",
+        "En caso de incumplimiento, la parte afectada podra rescindir el",
+        "acuerdo notificando a la otra en el domicilio constituido.",
+    ]
+
+
+# Tipo de página -> (generador de líneas, es factura)
+TIPOS_PAGINA = {
+    "factura": (factura, True),
+    "factura_codigo": (factura_codigo, True),
+    "factura_proveedor": (factura_proveedor, True),
+    "remito": (remito, False),
+    "presupuesto": (presupuesto, False),
+    "email": (email, False),
+    "email_factura": (email_factura, False),
+    "continuacion": (continuacion, False),
+    "contrato": (contrato, False),
+}
+
+
+def paginas_sinteticas(cantidad, semilla=0):
+    """Devuelve `cantidad` páginas (tipo, líneas, es_factura) de tipos al azar."""
+    rng = random.Random(semilla)
+    tipos = sorted(TIPOS_PAGINA)
+    paginas = []
+    for _ in range(cantidad):
+        tipo = rng.choice(tipos)
+        generador, es_factura = TIPOS_PAGINA[tipo]
+        paginas.append((tipo, generador(rng), es_factura))
+    return paginas
+
+
+def ruido_ocr(texto, rng, tasa=0.02):
+    """Aplica confusiones de OCR al azar a una fracción `tasa` de los caracteres."""
+    return "".join(
+        CONFUSIONES_OCR[c] if c in CONFUSIONES_OCR and rng.random() < tasa else c
+        for c in texto
+    )
+
+
+def textos_etiquetados(cantidad, tasa_ruido=0.02, semilla=0):
+    """Textos de página etiquetados: [(tipo, texto, es_factura)].
+
+    Con `tasa_ruido` > 0 se simulan errores de OCR sobre el texto.
+    """
+    rng = random.Random(semilla)
+    return [
+        (tipo, ruido_ocr("\n".join(lineas), rng, tasa_ruido), es_factura)
+        for tipo, lineas, es_factura in paginas_sinteticas(cantidad, semilla)
+    ]
+
+
+def _pagina_digital(doc, lineas):
+    pagina = doc.new_page(width=595, height=842)  # A4
+    for i, linea in enumerate(lineas):
+        pagina.insert_text((50, 60 + i * 16), linea, fontsize=11)
+    return pagina
+
+
+def crear_pdf(paginas, escaneado=False, semilla=0, dpi=DPI_ESCANEO):
+    """PDF en bytes con una página por elemento de `paginas` (tipo, líneas, etiqueta).
+
+    Escaneado: cada página se rasteriza en grises a `dpi` con algo de ruido y
+    se guarda como una imagen JPEG, sin capa de texto (hay que pasarla por OCR).
+    """
+    rng = np.random.default_rng(semilla)
+    doc = fitz.open()
+    for _, lineas, _ in paginas:
+        if not escaneado:
+            _pagina_digital(doc, lineas)
+            continue
+        borrador = fitz.open()
+        pix = _pagina_digital(borrador, lineas).get_pixmap(
+            dpi=dpi, colorspace=fitz.csGRAY
+        )
+        pixeles = np.frombuffer(pix.samples, dtype=np.uint8).reshape(
+            pix.height, pix.width
+        )
+        ruido = rng.normal(0, 12, pixeles.shape)
+        pixeles = np.clip(pixeles + ruido, 0, 255).astype(np.uint8)
+        imagen = io.BytesIO()
+        Image.fromarray(pixeles).save(imagen, "JPEG", quality=75)
+        borrador.close()
+        pagina = doc.new_page(width=595, height=842)
+        pagina.insert_image(pagina.rect, stream=imagen.getvalue())
+    datos = doc.tobytes(garbage=1)
+    doc.close()
+    return datos
+
+
+def crear_corpus(
+    carpeta, documentos=8, paginas_por_documento=10, escaneados=True, semilla=0
+):
+    """Escribe el corpus en `carpeta` y devuelve [(ruta, escaneado, etiquetas)].
+
+    Con `escaneados`, la mitad de los documentos (uno sí, uno no) son escaneados.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    corpus = []
+    for numero in range(documentos):
+        paginas = paginas_sinteticas(paginas_por_documento, semilla + numero)
+        escaneado = escaneados and numero % 2 == 1
+        tipo = "escaneado" if escaneado else "digital"
+        ruta = os.path.join(carpeta, f"doc_{numero + 1:03d}_{tipo}.pdf")
+        with open(ruta, "wb") as archivo:
+            archivo.write(crear_pdf(paginas, escaneado, semilla + numero))
+        corpus.append((ruta, escaneado, [etiqueta for _, _, etiqueta in paginas]))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("carpeta", help="carpeta donde escribir los PDFs")
+    parser.add_argument("--documentos", type=int, default=8)
+    parser.add_argument("--paginas", type=int, default=10)
+    parser.add_argument("--sin-escaneados", action="store_true")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = crear_corpus(
+        args.carpeta,
+        args.documentos,
+        args.paginas,
+        not args.sin_escaneados,
+        args.semilla,
+    )
+    for ruta, _, etiquetas in corpus:
+        print(f"{ruta}: {len(etiquetas)} páginas, {sum(etiquetas)} facturas")
+
+
+if __name__ == "__main__":
+    main()
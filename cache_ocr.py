@@ -0,0 +1,276 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+
+from extraccion import (
+    AJUSTE_DPI_ESCANEO,
+    ANCHO_MAXIMO_RENDER,
+    ANCHO_MINIMO_RENDER,
+    DPI_RENDER,
+    ESPACIO_COLOR_RENDER,
+    MARGEN_DPI_ESCANEO,
+    MIN_CARACTERES_CAPA_TEXTO,
+    etapas_lectura,
+)
+from motores_ocr import IDIOMAS_TESSERACT, OEM_TESSERACT, PSM_TESSERACT, version_motor
+
+# Archivo de la caché de OCR, compartido por lector.py, app.py y app_easyocr.py
+RUTA_CACHE_OCR = os.path.join(
+    os.path.expanduser("~"), ".cache", "lector_facturas", "ocr.sqlite3"
+)
+
+# Tamaño máximo de los textos guardados; al superarlo se borran los menos usados
+TAMANO_MAXIMO_CACHE = 200 * 1024 * 1024
+
+# Al desalojar, se borra hasta quedar en esta fracción del tamaño máximo
+FRACCION_DESALOJO = 0.9
+
+
+def hash_archivo(pdf_path):
+    """Hash SHA-256 del contenido del archivo."""
+    sha = hashlib.sha256()
+    with open(pdf_path, "rb") as archivo:
+        for bloque in iter(lambda: archivo.read(1024 * 1024), b""):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+def hash_contenido(datos):
+    """Hash SHA-256 de un contenido en memoria (por ejemplo, un archivo subido)."""
+    return hashlib.sha256(datos).hexdigest()
+
+
+def parametros_cache(
+    motor, usar_capa_texto, fraccion_recorte, preprocesar=False, escalonada=False
+):
+    """Texto que identifica cómo se leyó la página (motor, versión y render)."""
+    parametros = (
+        f"{version_motor(motor)}|{IDIOMAS_TESSERACT}"
+        f"|psm={PSM_TESSERACT}|oem={OEM_TESSERACT}"
+        f"|recorte={fraccion_recorte:.3f}|dpi={DPI_RENDER}"
+        f"|ancho={ANCHO_MINIMO_RENDER}-{ANCHO_MAXIMO_RENDER}"
+        f"|escaneo={MARGEN_DPI_ESCANEO}:{AJUSTE_DPI_ESCANEO}"
+        f"|color={ESPACIO_COLOR_RENDER.name}|pre={int(bool(preprocesar))}"
+        f"|capa={int(bool(usar_capa_texto))}|min={MIN_CARACTERES_CAPA_TEXTO}"
+    )
+    if escalonada:
+        # Se guarda el texto de la última lectura de cada página
+        parametros += "|lecturas=" + ",".join(
+            f"{fraccion:.3f}@{dpi}" + (f"<{maximo}" if maximo else "")
+            for fraccion, dpi, maximo in etapas_lectura(fraccion_recorte, escalonada)
+        )
+    return parametros
+
+
+class CacheOCR:
+    """Caché en disco (SQLite) de los textos de cada página.
+
+    La clave es el hash del contenido del PDF, el índice de página y los
+    parámetros de lectura, así que renombrar o volver a subir el mismo archivo
+    reutiliza los textos. Solo guarda la ruta: se puede enviar a los procesos
+    del pool y cada operación abre su propia conexión.
+    """
+
+    def __init__(self, ruta=RUTA_CACHE_OCR, tamano_maximo=TAMANO_MAXIMO_CACHE):
+        self.ruta = ruta
+        self.tamano_maximo = tamano_maximo
+        self._tabla_creada = False
+
+    def _conectar(self):
+        if os.path.dirname(self.ruta):
+            os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+        con = sqlite3.connect(self.ruta, timeout=30)
+        if not self._tabla_creada:
+            # WAL permite leer mientras otro proceso del pool escribe
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute(
+                """
+                CREATE TABLE IF NOT EXISTS paginas (
+                    hash_pdf TEXT NOT NULL,
+                    pagina INTEGER NOT NULL,
+                    parametros TEXT NOT NULL,
+                    texto TEXT NOT NULL,
+                    metodo TEXT NOT NULL,
+                    tamano INTEGER NOT NULL,
+                    ultimo_uso REAL NOT NULL,
+                    PRIMARY KEY (hash_pdf, parametros, pagina)
+                )
+                """
+            )
+            con.execute(
+                "CREATE INDEX IF NOT EXISTS idx_ultimo_uso ON paginas (ultimo_uso)"
+            )
+            con.commit()
+            self._tabla_creada = True
+        return con
+
+    def para_pdf(
+        self,
+        pdf_path,
+        motor,
+        usar_capa_texto,
+        fraccion_recorte,
+        preprocesar=False,
+        escalonada=False,
+    ):
+        """Devuelve la caché de las páginas de un PDF leído con estos parámetros."""
+        return CachePaginas(
+            self,
+            hash_archivo(pdf_path),
+            parametros_cache(
+                motor, usar_capa_texto, fraccion_recorte, preprocesar, escalonada
+            ),
+        )
+
+    def para_contenido(
+        self,
+        datos_pdf,
+        motor,
+        usar_capa_texto,
+        fraccion_recorte,
+        preprocesar=False,
+        escalonada=False,
+    ):
+        """Igual que `para_pdf`, para un PDF en memoria (por ejemplo, subido)."""
+        return CachePaginas(
+            self,
+            hash_contenido(datos_pdf),
+            parametros_cache(
+                motor, usar_capa_texto, fraccion_recorte, preprocesar, escalonada
+            ),
+        )
+
+    def obtener_paginas(self, hash_pdf, parametros):
+        """Devuelve {índice de página: (texto, método)} de las páginas guardadas."""
+        con = self._conectar()
+        try:
+            filas = con.execute(
+                "SELECT pagina, texto, metodo FROM paginas"
+                " WHERE hash_pdf = ? AND parametros = ?",
+                (hash_pdf, parametros),
+            ).fetchall()
+            if filas:
+                con.execute(
+                    "UPDATE paginas SET ultimo_uso = ?"
+                    " WHERE hash_pdf = ? AND parametros = ?",
+                    (time.time(), hash_pdf, parametros),
+                )
+                con.commit()
+        finally:
+            con.close()
+        return {pagina: (texto, metodo) for pagina, texto, metodo in filas}
+
+    def guardar_paginas(self, hash_pdf, parametros, paginas):
+        """Guarda {índice de página: (texto, método)} y desaloja si hace falta."""
+        if not paginas:
+            return
+        ahora = time.time()
+        con = self._conectar()
+        try:
+            con.executemany(
+                "INSERT OR REPLACE INTO paginas"
+                " (hash_pdf, pagina, parametros, texto, metodo, tamano, ultimo_uso)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        hash_pdf,
+                        pagina,
+                        parametros,
+                        texto,
+                        metodo,
+                        len(texto.encode("utf-8")),
+                        ahora,
+                    )
+                    for pagina, (texto, metodo) in paginas.items()
+                ],
+            )
+            self._desalojar(con)
+            con.commit()
+        finally:
+            con.close()
+
+    def _desalojar(self, con):
+        """Borra las páginas usadas hace más tiempo si se superó el tamaño máximo."""
+        fila = con.execute("SELECT COALESCE(SUM(tamano), 0) FROM paginas").fetchone()
+        total = fila[0]
+        if total <= self.tamano_maximo:
+            return
+        a_liberar = total - int(self.tamano_maximo * FRACCION_DESALOJO)
+        liberado = 0
+        borrar = []
+        for rowid, tamano in con.execute(
+            "SELECT rowid, tamano FROM paginas ORDER BY ultimo_uso"
+        ):
+            borrar.append((rowid,))
+            liberado += tamano
+            if liberado >= a_liberar:
+                break
+        con.executemany("DELETE FROM paginas WHERE rowid = ?", borrar)
+
+    def invalidar(self, hash_pdf=None):
+        """Borra las páginas de un PDF (por hash) o toda la caché."""
+        con = self._conectar()
+        try:
+            if hash_pdf is None:
+                con.execute("DELETE FROM paginas")
+            else:
+                con.execute("DELETE FROM paginas WHERE hash_pdf = ?", (hash_pdf,))
+            con.commit()
+            con.execute("VACUUM")
+        finally:
+            con.close()
+
+    def estadisticas(self):
+        """Devuelve (cantidad de páginas, bytes de texto guardados)."""
+        con = self._conectar()
+        try:
+            return con.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tamano), 0) FROM paginas"
+            ).fetchone()
+        finally:
+            con.close()
+
+
+class CachePaginas:
+    """Caché de las páginas de un PDF con unos parámetros de lectura dados."""
+
+    def __init__(self, cache, hash_pdf, parametros):
+        self.cache = cache
+        self.hash_pdf = hash_pdf
+        self.parametros = parametros
+
+    def obtener(self):
+        return self.cache.obtener_paginas(self.hash_pdf, self.parametros)
+
+    def guardar(self, paginas):
+        self.cache.guardar_paginas(self.hash_pdf, self.parametros, paginas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Administra la caché de OCR.")
+    parser.add_argument("--ruta", default=RUTA_CACHE_OCR)
+    parser.add_argument(
+        "--vaciar", action="store_true", help="borra toda la caché de OCR"
+    )
+    parser.add_argument(
+        "--invalidar",
+        nargs="+",
+        metavar="PDF",
+        help="borra las páginas guardadas de estos PDFs",
+    )
+    args = parser.parse_args()
+
+    cache = CacheOCR(args.ruta)
+    if args.vaciar:
+        cache.invalidar()
+    for pdf_path in args.invalidar or []:
+        cache.invalidar(hash_archivo(pdf_path))
+
+    paginas, tamano = cache.estadisticas()
+    print(f"{args.ruta}: {paginas} páginas, {tamano / 1024 / 1024:.1f} MB de texto")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Límites de la caché de resultados en memoria (compartida entre sesiones)
+MAX_ENTRADAS_RESULTADOS = 500
+MAX_BYTES_RESULTADOS = 50 * 1024 * 1024
+TTL_RESULTADOS = 6 * 60 * 60  # segundos
+
+
+def tamano_resultado(resultado):
+    """Tamaño aproximado en bytes de (textos, métodos, páginas de facturas)."""
+    textos_paginas, metodos_paginas, paginas_facturas = resultado
+    return (
+        sum(len(texto) for texto in textos_paginas)
+        + 8 * len(metodos_paginas)
+        + 8 * len(paginas_facturas)
+    )
+
+
+class CacheResultados:
+    """Caché en memoria de los resultados por archivo, con LRU y vencimiento.
+
+    Guarda (textos, métodos, páginas de facturas) de cada PDF según el hash de
+    su contenido y los parámetros de lectura. Es thread-safe: en Streamlit una
+    sola instancia se comparte entre todas las sesiones.
+    """
+
+    def __init__(
+        self,
+        max_entradas=MAX_ENTRADAS_RESULTADOS,
+        max_bytes=MAX_BYTES_RESULTADOS,
+        ttl=TTL_RESULTADOS,
+    ):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.aciertos = 0
+        self.fallos = 0
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _quitar(self, clave):
+        _, tamano, _ = self._entradas.pop(clave)
+        self._bytes -= tamano
+
+    def _vigente(self, clave):
+        """Indica si la entrada existe y no venció (la borra si venció)."""
+        if clave not in self._entradas:
+            return False
+        if time.monotonic() - self._entradas[clave][2] > self.ttl:
+            self._quitar(clave)
+            return False
+        return True
+
+    def contiene(self, clave):
+        """Indica si hay un resultado vigente, sin contarlo como consulta."""
+        with self._lock:
+            return self._vigente(clave)
+
+    def obtener(self, clave):
+        """Devuelve el resultado guardado o None, y cuenta el acierto o fallo."""
+        with self._lock:
+            if not self._vigente(clave):
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return self._entradas[clave][0]
+
+    def guardar(self, clave, resultado):
+        """Guarda el resultado y borra los menos usados si se superan los límites."""
+        tamano = tamano_resultado(resultado)
+        if tamano > self.max_bytes:
+            return
+        with self._lock:
+            if clave in self._entradas:
+                self._quitar(clave)
+            self._entradas[clave] = (resultado, tamano, time.monotonic())
+            self._bytes += tamano
+            while (
+                len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes
+            ):
+                self._quitar(next(iter(self._entradas)))
+
+    def estadisticas(self):
+        """Devuelve (aciertos, consultas, archivos guardados)."""
+        with self._lock:
+            return self.aciertos, self.aciertos + self.fallos, len(self._entradas)
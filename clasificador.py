@@ -0,0 +1,323 @@
+import bisect
+import re
+from collections import namedtuple
+
+# Reglas que no encontraron nada en el texto: la decisión es "no es factura"
+# por descarte y puede cambiar leyendo más de la página (por ejemplo, si el
+# encabezado de la factura quedó fuera de la región leída)
+REGLAS_INDECISAS = {"sin_patron"}
+
+
+class Decision(namedtuple("Decision", ["es_factura", "regla", "evidencia"])):
+    """Resultado de clasificar una página: la decisión, la regla que la tomó y
+    lo que se encontró en el texto (para poder revisar por qué se decidió así).
+    """
+
+    __slots__ = ()
+
+    @property
+    def indecisa(self):
+        """True si ninguna regla encontró evidencia (ver REGLAS_INDECISAS)."""
+        return self.regla in REGLAS_INDECISAS
+
+
+# Palabras que indican que NO es una factura
+PALABRAS_EXCLUSION = [
+    "remito",
+    "orden de compra",
+    "pedido",
+    "presupuesto",
+    "cotización",
+    "proforma",
+    "documento no valido como factura",
+    "no valido como factura",
+    "no válido como factura",
+]
+
+# "COMO FACTURA" con posibles errores de OCR
+PALABRAS_COMO_FACTURA = ["como factura", "cowo factura"]
+
+# Patrones de email; varios juntos indican que la página es un email
+PATRONES_EMAIL = [
+    r"^\d{1,2}/\d{1,2}/\d{2,4},\s*\d{1,2}:\d{2}",  # Fecha y hora al inicio
+    r"correo de\s+\w+",  # "Correo de [nombre]"
+    r"fwd:\s*",  # "Fwd:"
+    r"re:\s*",  # "Re:"
+    r"para:\s*",  # "Para:"
+    r"de:\s*",  # "De:"
+    r"asunto:\s*",  # "Asunto:"
+    r"adjuntos?\s*\d*",  # "adjunto" o "adjuntos"
+    r"\d+k\s*$",  # Tamaño de archivo al final (ej: "36K")
+    r"\d+\s+mensajes?",  # "3 mensajes" o "1 mensaje"
+]
+
+# Patrones de email que equivalen a buscar un literal (el resto sigue siendo regex)
+LITERALES_EMAIL = ["fwd:", "re:", "para:", "de:", "asunto:", "adjunto"]
+PATRONES_EMAIL_REGEX = [
+    r"correo de\s+\w+",
+    r"\d+k\s*$",
+    r"\d+\s+mensajes?",
+]
+
+# Palabras que activan la revisión de estructura de email
+PALABRAS_INICIO_EMAIL = ["fwd:", "re:", "correo de"]
+
+# Palabras que marcan una línea con estructura de email
+PALABRAS_LINEA_EMAIL = [
+    "correo de",
+    "re:",
+    "fwd:",
+    "para:",
+    "de:",
+    "asunto:",
+    "mensaje",
+    "escribio:",
+    "escribió:",
+    "adjuntos",
+    "adjunto",
+]
+
+# "factura" mencionada dentro de un email
+REFERENCIAS_FACTURA_EMAIL = [
+    "realizar la factura",
+    "factura correspondiente",
+    "enviar factura",
+    "fwd: factura",
+    "re: factura",
+]
+
+# Patrón específico para factura
+PATRONES_FACTURA = [
+    r"factura\s+n[°º]?\s*:\s*\d+-\d+",  # FACTURA N°: 0003-00016403
+    r"factura\s+n[°º]?\s*\d+-\d+",  # FACTURA N° 0003-00016403
+    r"factura\s+n[°º]?\s*:\s*\d+/\d+",  # FACTURA N°: 0003/00016403
+    r"factura\s+n[°º]?\s*\d+/\d+",  # FACTURA N° 0003/00016403
+    r"punto de venta\s*:\s*\d+\s+comp\.?nro\s*:\s*\d+",  # Punto de Venta: 00004 Comp.Nro: 00006772
+    r"punto de venta\s*:\s*\d+\s+comp\s*nro\s*:\s*\d+",  # Punto de Venta: 00004 Comp Nro: 00006772
+    r"cod\.\s*\d+",  # COD. 01
+    r"codigo\s*\d+",  # CODIGO 01
+    r"cod\.\s*n[°º]?\s*\d+",  # Cod.N° 01
+    r"cod\s*n[°º]?\s*\d+",  # Cod N° 01 (sin punto)
+    r"cod\.\s*n\s*\d+",  # Cod.N 01 (sin símbolo)
+    r"cod\s*n\s*\d+",  # Cod N 01 (sin punto ni símbolo)
+    r"cod\.\s*n[°º]?\s*\d+\s*\w*",  # Cod.N° 01 jo (con caracteres extra)
+    r"cod\s*n[°º]?\s*\d+\s*\w*",  # Cod N° 01 jo (sin punto, con caracteres extra)
+    r"céd\.\s*\d+",  # Céd. 01
+    r"céd\s*\d+",  # Céd 01 (sin punto)
+    r"empresa distribuidora y comercializadora norte s\.a\.",  # Empresa Distribuidora y Comercializadora Norte S.A.
+    r"amx argentina s\.a",  # AMX ARGENTINA S.A
+]
+
+# Patrones de factura que son texto literal (proveedores conocidos)
+LITERALES_FACTURA = [
+    "empresa distribuidora y comercializadora norte s.a.",
+    "amx argentina s.a",
+]
+
+
+class ClasificadorFacturas:
+    """Clasificador de páginas compilado una sola vez.
+
+    Toma las mismas decisiones que `es_factura_original`, pero:
+
+    - todos los literales (exclusiones, marcas de email, "factura", ...) se
+      buscan en una sola pasada al principio y las reglas consultan ese
+      conjunto, en lugar de volver a recorrer el texto en cada regla;
+    - las regex se compilan una vez y solo se evalúan si su literal está en el
+      texto ("mensaje", "correo de", "cod", "céd", "punto de venta");
+    - los patrones de factura equivalentes se combinan en una regex por
+      familia, y los que empiezan con "factura" no se evalúan porque esa
+      palabra ya decide antes.
+    """
+
+    def __init__(self):
+        self._literales = sorted(
+            set(
+                PALABRAS_EXCLUSION
+                + ["documento no", "no es un documento valido", "factura"]
+                + PALABRAS_COMO_FACTURA
+                + LITERALES_EMAIL
+                + PALABRAS_INICIO_EMAIL
+                + PALABRAS_LINEA_EMAIL
+                + REFERENCIAS_FACTURA_EMAIL
+                + ["cod", "céd", "punto de venta"]
+                + LITERALES_FACTURA
+            )
+        )
+
+        # Patrones de email que no son literales
+        self._fecha_email = re.compile(PATRONES_EMAIL[0])
+        self._correo_de = re.compile(r"correo de\s+\w")
+        self._mensajes = re.compile(r"\d\s+mensaje")
+
+        # Patrones de factura agrupados (equivalen a los de PATRONES_FACTURA)
+        self._cod = re.compile(r"cod(?:\.\s*(?:n[°º]?\s*)?|\s*n[°º]?\s*|igo\s*)\d")
+        self._ced = re.compile(r"céd\.?\s*\d")
+        self._punto_de_venta = re.compile(
+            r"punto de venta\s*:\s*\d+\s+comp(?:\.?|\s*)nro\s*:\s*\d"
+        )
+
+    def _buscar_literales(self, texto_lower):
+        """Conjunto de literales presentes en el texto."""
+        return {literal for literal in self._literales if literal in texto_lower}
+
+    def _lineas_email(self, texto_lower, presentes):
+        """Índices de las líneas que tienen alguna marca de email."""
+        saltos = [m.start() for m in re.finditer("\n", texto_lower)]
+        lineas = set()
+        for palabra in PALABRAS_LINEA_EMAIL:
+            if palabra not in presentes:
+                continue
+            posicion = texto_lower.find(palabra)
+            while posicion != -1:
+                lineas.add(bisect.bisect_left(saltos, posicion))
+                posicion = texto_lower.find(palabra, posicion + 1)
+        return lineas
+
+    def _patrones_email(self, texto_lower, presentes):
+        """Patrones de email presentes; deja de buscar al llegar a dos."""
+        encontrados = [literal for literal in LITERALES_EMAIL if literal in presentes]
+        if len(encontrados) >= 2:
+            return encontrados
+
+        if self._fecha_email.match(texto_lower):
+            encontrados.append("fecha y hora al inicio")
+        if "correo de" in presentes and self._correo_de.search(texto_lower):
+            encontrados.append("correo de")
+        # "\d+k\s*$": el texto termina en un tamaño de archivo (ej: "36K")
+        final = texto_lower.rstrip()
+        if len(final) >= 2 and final[-1] == "k" and final[-2].isdecimal():
+            encontrados.append("tamaño de archivo al final")
+        if "mensaje" in presentes and self._mensajes.search(texto_lower):
+            encontrados.append("mensajes")
+        return encontrados
+
+    def _patron_factura(self, texto_lower, presentes):
+        """Devuelve el primer patrón específico de factura encontrado, o None."""
+        for literal in LITERALES_FACTURA:
+            if literal in presentes:
+                return literal
+        for literal, patron in (
+            ("punto de venta", self._punto_de_venta),
+            ("cod", self._cod),
+            ("céd", self._ced),
+        ):
+            if literal in presentes:
+                match = patron.search(texto_lower)
+                if match:
+                    return match.group(0)
+        return None
+
+    def clasificar(self, texto):
+        """Clasifica la página y devuelve la `Decision` con su traza."""
+        texto_lower = texto.lower()
+        presentes = self._buscar_literales(texto_lower)
+
+        # Solo excluir si el documento es principalmente de ese tipo
+        exclusiones = [
+            palabra for palabra in PALABRAS_EXCLUSION if palabra in presentes
+        ]
+        if len(exclusiones) >= 2:
+            return Decision(False, "exclusion", exclusiones)
+
+        # Documentos específicos que siempre se excluyen
+        if "documento no" in presentes:
+            return Decision(False, "documento_no", ["documento no"])
+
+        # "COMO FACTURA" con posibles errores de OCR
+        como_factura = [p for p in PALABRAS_COMO_FACTURA if p in presentes]
+        if como_factura and "no es un documento valido" not in presentes:
+            return Decision(False, "como_factura", como_factura)
+
+        # Varios patrones de email: es muy probable que sea un email
+        patrones_email = self._patrones_email(texto_lower, presentes)
+        if len(patrones_email) >= 2:
+            return Decision(False, "email_patrones", patrones_email)
+
+        # Estructura específica de email con "Fwd:" o "Re:"
+        if any(palabra in presentes for palabra in PALABRAS_INICIO_EMAIL):
+            lineas_email = self._lineas_email(texto_lower, presentes)
+            if lineas_email and "factura" in presentes:
+                referencias = [
+                    ref for ref in REFERENCIAS_FACTURA_EMAIL if ref in presentes
+                ]
+                if referencias:
+                    return Decision(False, "email_referencia_factura", referencias)
+
+            if len(lineas_email) >= 2:
+                return Decision(False, "email_lineas", sorted(lineas_email))
+
+        # Contiene "factura" o "facturas" directamente
+        if "factura" in presentes:
+            return Decision(True, "palabra_factura", ["factura"])
+
+        # Patrones específicos de factura
+        patron = self._patron_factura(texto_lower, presentes)
+        if patron is not None:
+            return Decision(True, "patron_factura", [patron])
+
+        return Decision(False, "sin_patron", [])
+
+    def es_factura(self, texto):
+        """Valida si el documento es una factura con patrón específico."""
+        return self.clasificar(texto).es_factura
+
+    def indecisa(self, texto):
+        """True si la página no tiene evidencia ni a favor ni en contra."""
+        return self.clasificar(texto).indecisa
+
+
+def es_factura_original(texto):
+    """Implementación original de `es_factura`, regla por regla.
+
+    Se conserva como referencia para comparar decisiones y tiempos con
+    `ClasificadorFacturas`.
+    """
+    texto_lower = texto.lower()
+
+    exclusion_count = sum(1 for palabra in PALABRAS_EXCLUSION if palabra in texto_lower)
+    if exclusion_count >= 2:
+        return False
+
+    if "documento no" in texto_lower:
+        return False
+
+    if (
+        "como factura" in texto_lower or "cowo factura" in texto_lower
+    ) and "no es un documento valido" not in texto_lower:
+        return False
+
+    patrones_email_encontrados = 0
+    for patron in PATRONES_EMAIL:
+        if re.search(patron, texto_lower):
+            patrones_email_encontrados += 1
+    if patrones_email_encontrados >= 2:
+        return False
+
+    if any(palabra in texto_lower for palabra in PALABRAS_INICIO_EMAIL):
+        lineas = texto_lower.split("\n")
+        lineas_con_email = sum(
+            1
+            for linea in lineas
+            if any(palabra in linea for palabra in PALABRAS_LINEA_EMAIL)
+        )
+
+        if lineas_con_email >= 1 and "factura" in texto_lower:
+            if any(palabra in texto_lower for palabra in REFERENCIAS_FACTURA_EMAIL):
+                return False
+
+        if lineas_con_email >= 2:
+            return False
+
+    if "factura" in texto_lower or "facturas" in texto_lower:
+        return True
+
+    for patron in PATRONES_FACTURA:
+        if re.search(patron, texto_lower):
+            return True
+
+    return False
+
+
+# Instancia compartida: las regex se compilan una sola vez por proceso
+clasificador = ClasificadorFacturas()
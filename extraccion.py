@@ -0,0 +1,521 @@
+import math
+import time
+
+import fitz  # PyMuPDF
+import numpy as np
+
+from clasificador import clasificador
+
+# Fracción superior de cada página que se lee (capa de texto u OCR)
+FRACCION_RECORTE = 0.25
+
+# Resolución con la que se lee la región para el OCR. El zoom sale del tamaño
+# de la página: DPI_RENDER, pero con el ancho de la región acotado entre
+# ANCHO_MINIMO_RENDER y ANCHO_MAXIMO_RENDER píxeles (las páginas chicas, como
+# los tickets, se amplían; las grandes, como los planos, no se vuelven enormes)
+DPI_RENDER = 150
+ANCHO_MINIMO_RENDER = 1000
+ANCHO_MAXIMO_RENDER = 2500
+
+# Una página es un escaneo si tiene una sola imagen que cubre al menos esta
+# fracción de su superficie. PyMuPDF decodifica los JPEG a 1/2, 1/4, ... de su
+# resolución cuando se renderizan por debajo de esa fracción, mucho más rápido
+# que la imagen completa: si los dpi elegidos quedan apenas por encima de una
+# de ellas (hasta un 1/MARGEN_DPI_ESCANEO), se renderiza a AJUSTE_DPI_ESCANEO
+# de esa fracción
+COBERTURA_IMAGEN_ESCANEO = 0.9
+MARGEN_DPI_ESCANEO = 0.75
+AJUSTE_DPI_ESCANEO = 0.98
+
+# La región se renderiza en escala de grises: el OCR solo usa la luminancia y
+# así cada página ocupa un tercio que en RGB
+ESPACIO_COLOR_RENDER = fitz.csGRAY
+
+# Preprocesamiento opcional antes del OCR (ver `preprocesar_imagen`):
+# percentiles que se estiran a negro y blanco, y píxeles de margen que se
+# dejan alrededor del contenido al recortar los bordes vacíos (una fila o
+# columna cuenta como vacía si menos de MIN_TINTA_BORDE de sus píxeles son
+# negros, así las motas sueltas del escaneo no impiden recortar)
+PERCENTILES_CONTRASTE = (1, 99)
+MARGEN_RECORTE = 10
+MIN_TINTA_BORDE = 0.005
+
+# Renglones de texto para leer sin detector (ver `cajas_renglones`): una fila
+# tiene texto si al menos MIN_TINTA_RENGLON de sus píxeles son tinta, los
+# tramos de menos de ALTO_MINIMO_RENGLON píxeles (motas, líneas de tablas)
+# se descartan y cada caja se agranda MARGEN_RENGLON píxeles
+MIN_TINTA_RENGLON = 0.002
+ALTO_MINIMO_RENGLON = 6
+MARGEN_RENGLON = 3
+
+# Lectura escalonada: primero una pasada rápida (una región más chica y con
+# menos resolución); las páginas que quedan indecisas (ver
+# `Decision.indecisa`) se vuelven a leer con la fracción configurada a
+# DPI_RENDER. La página completa solo se lee si además la región tiene menos
+# de MAX_CARACTERES_PAGINA_COMPLETA caracteres (sin contar espacios): casi
+# vacía, como cuando el encabezado está más abajo. Las páginas con texto de
+# sobra y sin evidencia (continuaciones, anexos) quedan como "no es factura"
+FRACCION_PASADA_RAPIDA = 0.15
+DPI_PASADA_RAPIDA = 100
+MAX_CARACTERES_PAGINA_COMPLETA = 80
+
+# Mínimo de caracteres en la capa de texto para no recurrir al OCR
+MIN_CARACTERES_CAPA_TEXTO = 20
+
+# Cada cuántas páginas leídas se guardan en la caché durante un PDF (así, si el
+# proceso se corta, las páginas ya leídas no se pierden)
+GUARDAR_CACHE_CADA = 25
+
+
+class LecturaCancelada(Exception):
+    """Se pidió dejar de leer (`extraer_textos_pdf` la deja pasar)."""
+
+
+def region_superior(pagina, fraccion_recorte=FRACCION_RECORTE):
+    """Devuelve el rectángulo con la fracción superior de la página."""
+    rect = pagina.rect
+    return fitz.Rect(
+        rect.x0, rect.y0, rect.x1, rect.y0 + rect.height * fraccion_recorte
+    )
+
+
+def extraer_texto_capa(pagina, fraccion_recorte=FRACCION_RECORTE):
+    """Lee el texto nativo de la región superior de la página (sin OCR)."""
+    return pagina.get_text("text", clip=region_superior(pagina, fraccion_recorte))
+
+
+def dpi_escaneo(pagina):
+    """Resolución (dpi) de la imagen si la página es un escaneo, o None."""
+    try:
+        imagenes = pagina.get_images(full=True)
+        if len(imagenes) != 1:
+            return None
+        bbox = pagina.get_image_bbox(imagenes[0])
+    except Exception:
+        return None
+    cubierta = bbox & pagina.rect
+    if cubierta.get_area() < pagina.rect.get_area() * COBERTURA_IMAGEN_ESCANEO:
+        return None
+    return imagenes[0][2] / bbox.width * 72
+
+
+def zoom_region(pagina, region, dpi=DPI_RENDER):
+    """Zoom para renderizar `region` de la página.
+
+    Apunta a `dpi` con el ancho en píxeles acotado (los límites se escalan con
+    `dpi` respecto de DPI_RENDER) y, en un escaneo, se baja apenas para que la
+    imagen se decodifique a una fracción de su resolución (ver
+    MARGEN_DPI_ESCANEO).
+    """
+    ancho = max(region.width, 1)
+    escala = dpi / DPI_RENDER
+    if ancho * dpi / 72 < ANCHO_MINIMO_RENDER * escala:
+        dpi = ANCHO_MINIMO_RENDER * escala / ancho * 72
+    elif ancho * dpi / 72 > ANCHO_MAXIMO_RENDER * escala:
+        dpi = ANCHO_MAXIMO_RENDER * escala / ancho * 72
+    nativo = dpi_escaneo(pagina)
+    if nativo and nativo > dpi:
+        fraccion = nativo / 2 ** math.ceil(math.log2(nativo * AJUSTE_DPI_ESCANEO / dpi))
+        if fraccion * AJUSTE_DPI_ESCANEO >= dpi * MARGEN_DPI_ESCANEO:
+            dpi = fraccion * AJUSTE_DPI_ESCANEO
+    return dpi / 72
+
+
+def renderizar_region(
+    pagina, fraccion_recorte=FRACCION_RECORTE, zoom=None, dpi=DPI_RENDER
+):
+    """Renderiza solo la región superior de la página (en grises), no la página completa.
+
+    Sin `zoom`, se elige con `zoom_region` según la página y `dpi`.
+    """
+    region = region_superior(pagina, fraccion_recorte)
+    if zoom is None:
+        zoom = zoom_region(pagina, region, dpi)
+    mat = fitz.Matrix(zoom, zoom)
+    return pagina.get_pixmap(
+        matrix=mat,
+        clip=region,
+        colorspace=ESPACIO_COLOR_RENDER,
+        alpha=False,
+    )
+
+
+def pixmap_a_array(pix):
+    """Expone el buffer del pixmap como array sin copiarlo.
+
+    La forma es (alto, ancho, canales), o (alto, ancho) si el pixmap tiene un
+    solo canal (así lo aceptan PIL, pytesseract y EasyOCR).
+    """
+    array = np.frombuffer(pix.samples_mv, dtype=np.uint8)
+    if pix.n == 1:
+        return array.reshape(pix.height, pix.stride)[:, : pix.width]
+    return array.reshape(pix.height, pix.width, pix.n)
+
+
+def normalizar_contraste(gris):
+    """Estira los niveles de gris para que el fondo quede blanco y el texto negro."""
+    histograma = np.bincount(gris.ravel(), minlength=256)
+    acumulado = np.cumsum(histograma) / gris.size
+    bajo = int(np.searchsorted(acumulado, PERCENTILES_CONTRASTE[0] / 100))
+    alto = int(np.searchsorted(acumulado, PERCENTILES_CONTRASTE[1] / 100))
+    if alto <= bajo:
+        return gris
+    # Tabla de 256 valores: se aplica con una indexación, sin cálculos por píxel
+    tabla = np.clip((np.arange(256) - bajo) * 255.0 / (alto - bajo), 0, 255)
+    return tabla.astype(np.uint8)[gris]
+
+
+def umbral_otsu(gris):
+    """Umbral de Otsu (separa texto y fondo) calculado sobre el histograma."""
+    histograma = np.bincount(gris.ravel(), minlength=256).astype(np.float64)
+    niveles = np.arange(256)
+    peso_fondo = np.cumsum(histograma)
+    peso_texto = gris.size - peso_fondo
+    suma = np.cumsum(histograma * niveles)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        media_fondo = suma / peso_fondo
+        media_texto = (suma[-1] - suma) / peso_texto
+        varianza = peso_fondo * peso_texto * (media_fondo - media_texto) ** 2
+    # Una imagen de un solo tono (página en blanco) no tiene umbral: queda igual
+    return int(np.argmax(np.nan_to_num(varianza)))
+
+
+def recortar_bordes(binaria):
+    """Recorta las filas y columnas vacías (blancas) de los bordes, con un margen."""
+    tinta = binaria < 128
+    alto, ancho = binaria.shape
+    filas = np.flatnonzero(tinta.sum(axis=1) > ancho * MIN_TINTA_BORDE)
+    columnas = np.flatnonzero(tinta.sum(axis=0) > alto * MIN_TINTA_BORDE)
+    if not len(filas) or not len(columnas):
+        return binaria
+    arriba = max(filas[0] - MARGEN_RECORTE, 0)
+    abajo = filas[-1] + MARGEN_RECORTE + 1
+    izquierda = max(columnas[0] - MARGEN_RECORTE, 0)
+    derecha = columnas[-1] + MARGEN_RECORTE + 1
+    return binaria[arriba:abajo, izquierda:derecha]
+
+
+def cajas_renglones(gris):
+    """Cajas [x_min, x_max, y_min, y_max] de los renglones de texto de la imagen.
+
+    Los renglones se separan por las filas sin tinta (proyección horizontal)
+    y cada uno se recorta a sus columnas con tinta. Sirve para regiones con
+    texto en renglones horizontales, como el encabezado de una factura.
+    """
+    tinta = gris < umbral_otsu(gris)
+    alto, ancho = tinta.shape
+    filas = (tinta.sum(axis=1) > ancho * MIN_TINTA_RENGLON).astype(np.int8)
+    # Índices donde empieza y termina cada tramo de filas con tinta
+    bordes = np.flatnonzero(np.diff(np.concatenate(([0], filas, [0]))))
+    cajas = []
+    for arriba, abajo in zip(bordes[::2], bordes[1::2]):
+        if abajo - arriba < ALTO_MINIMO_RENGLON:
+            continue
+        columnas = np.flatnonzero(tinta[arriba:abajo].any(axis=0))
+        cajas.append(
+            [
+                int(max(columnas[0] - MARGEN_RENGLON, 0)),
+                int(min(columnas[-1] + MARGEN_RENGLON + 1, ancho)),
+                int(max(arriba - MARGEN_RENGLON, 0)),
+                int(min(abajo + MARGEN_RENGLON, alto)),
+            ]
+        )
+    return cajas
+
+
+def preprocesar_imagen(gris):
+    """Normaliza el contraste, binariza (Otsu) y recorta los bordes vacíos."""
+    gris = normalizar_contraste(gris)
+    binaria = np.where(gris > umbral_otsu(gris), 255, 0).astype(np.uint8)
+    return recortar_bordes(binaria)
+
+
+def preprocesar_pixmap(pix):
+    """Aplica `preprocesar_imagen` y devuelve un pixmap en grises con el resultado."""
+    if pix.n != 1:
+        pix = fitz.Pixmap(fitz.csGRAY, pix)
+    imagen = np.ascontiguousarray(preprocesar_imagen(pixmap_a_array(pix)))
+    alto, ancho = imagen.shape
+    return fitz.Pixmap(fitz.csGRAY, ancho, alto, imagen.tobytes(), False)
+
+
+def abrir_pdf(pdf):
+    """Abre el PDF desde su ruta o desde su contenido en memoria (bytes)."""
+    if isinstance(pdf, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=pdf, filetype="pdf")
+    return fitz.open(pdf)
+
+
+def contar_paginas(pdf):
+    """Cantidad de páginas del PDF (ruta o bytes; 0 si no se puede abrir)."""
+    try:
+        with abrir_pdf(pdf) as doc:
+            return len(doc)
+    except Exception:
+        return 0
+
+
+def leer_capa_texto(pagina, usar_capa_texto=True, fraccion_recorte=FRACCION_RECORTE):
+    """Texto nativo de la región superior si alcanza para no usar OCR, o None."""
+    if usar_capa_texto:
+        texto_capa = extraer_texto_capa(pagina, fraccion_recorte)
+        if len(texto_capa.strip()) >= MIN_CARACTERES_CAPA_TEXTO:
+            return texto_capa
+    return None
+
+
+def etapas_lectura(fraccion_recorte=FRACCION_RECORTE, escalonada=False):
+    """Lecturas (fracción, dpi, máximo de caracteres) por las que puede pasar
+    cada página, en orden.
+
+    Sin `escalonada` hay una sola. Con `escalonada`, la pasada rápida, la
+    fracción configurada y la página completa (ver FRACCION_PASADA_RAPIDA).
+    Una página indecisa pasa a la lectura siguiente solo si lo leído hasta
+    ahí tiene menos caracteres que su máximo (None = sin límite).
+    """
+    if not escalonada:
+        return [(fraccion_recorte, DPI_RENDER, None)]
+    etapas = [
+        (min(FRACCION_PASADA_RAPIDA, fraccion_recorte), DPI_PASADA_RAPIDA, None),
+        (fraccion_recorte, DPI_RENDER, None),
+    ]
+    if fraccion_recorte < 1:
+        etapas.append((1.0, DPI_RENDER, MAX_CARACTERES_PAGINA_COMPLETA))
+    return etapas
+
+
+def sumar_tiempo(tiempos_pagina, etapa, segundos):
+    """Suma `segundos` a la etapa (una página puede pasar varias veces por ella)."""
+    tiempos_pagina[etapa] = tiempos_pagina.get(etapa, 0.0) + segundos
+
+
+def preparar_region(
+    pagina,
+    usar_capa_texto,
+    fraccion_recorte,
+    dpi,
+    preprocesar,
+    tiempos_pagina,
+    fraccion_capa=None,
+):
+    """Lee la capa de texto de la región o, si no alcanza, la prepara para el OCR.
+
+    Devuelve (texto, None) si alcanzó la capa de texto o (None, pixmap) con la
+    región renderizada (y preprocesada). La capa de texto se lee en
+    `fraccion_capa` (por defecto, la misma región). Suma los segundos de
+    "capa", "render" y "preproceso" a `tiempos_pagina`.
+    """
+    inicio = time.perf_counter()
+    texto = leer_capa_texto(pagina, usar_capa_texto, fraccion_capa or fraccion_recorte)
+    fin_capa = time.perf_counter()
+    sumar_tiempo(tiempos_pagina, "capa", fin_capa - inicio)
+    if texto is not None:
+        return texto, None
+    pix = renderizar_region(pagina, fraccion_recorte, dpi=dpi)
+    fin_render = time.perf_counter()
+    sumar_tiempo(tiempos_pagina, "render", fin_render - fin_capa)
+    if preprocesar:
+        pix = preprocesar_pixmap(pix)
+        sumar_tiempo(tiempos_pagina, "preproceso", time.perf_counter() - fin_render)
+    return None, pix
+
+
+def escalar_lectura(
+    pagina, ocr, texto, metodo, etapas, usar_capa_texto, preprocesar, tiempos_pagina
+):
+    """Vuelve a leer la página con cada una de `etapas` mientras siga indecisa.
+
+    Devuelve (texto, método) de la última lectura y cuenta cada una en
+    `tiempos_pagina["lecturas"]`.
+    """
+    for fraccion_recorte, dpi, max_caracteres in etapas:
+        if not clasificador.indecisa(texto) or (
+            max_caracteres is not None and len("".join(texto.split())) >= max_caracteres
+        ):
+            break
+        texto, pix = preparar_region(
+            pagina, usar_capa_texto, fraccion_recorte, dpi, preprocesar, tiempos_pagina
+        )
+        metodo = "texto"
+        if pix is not None:
+            inicio = time.perf_counter()
+            texto = ocr(pix)
+            sumar_tiempo(tiempos_pagina, "ocr", time.perf_counter() - inicio)
+            metodo = "ocr"
+        tiempos_pagina["lecturas"] += 1
+    return texto, metodo
+
+
+def extraer_textos_pdf(
+    pdf,
+    ocr,
+    usar_capa_texto=True,
+    fraccion_recorte=FRACCION_RECORTE,
+    paginas=None,
+    cache=None,
+    ocr_lote=None,
+    tamano_lote=1,
+    progreso=None,
+    tiempos=None,
+    preprocesar=False,
+    escalonada=False,
+):
+    """Extrae el texto de cada página del PDF.
+
+    `pdf` es la ruta, el contenido en bytes o un documento ya abierto (que se
+    deja abierto para seguir usándolo).
+    Devuelve (textos, métodos, error). Si falla a mitad del documento se
+    conservan las páginas ya leídas y `error` contiene el mensaje. Si
+    `progreso` lanza `LecturaCancelada`, la excepción se propaga.
+    `paginas` limita la lectura a esos índices (por defecto, todas) y `cache`
+    (una `CachePaginas`) evita renderizar las páginas ya leídas antes; las
+    páginas nuevas se guardan cada `GUARDAR_CACHE_CADA` y al terminar.
+    Con `ocr_lote` (recibe una lista de pixmaps y devuelve sus textos) las
+    páginas que necesitan OCR se juntan de a `tamano_lote` en vez de leerse
+    una por una. `progreso`, si se indica, se llama con la cantidad de páginas
+    que se terminan de leer cada vez. Con `preprocesar`, cada región se pasa
+    por `preprocesar_pixmap` antes del OCR.
+    Con `escalonada`, cada página se lee primero con la pasada rápida y solo
+    las indecisas se vuelven a leer con las lecturas siguientes (ver
+    `etapas_lectura`); el texto de una página es el de su última lectura.
+    Si `tiempos` es una lista, se le agrega por cada página leída un dict con
+    los segundos de cada etapa ("cache", "capa", "render", "preproceso",
+    "ocr", sumando todas sus lecturas) y la cantidad de "lecturas"; el OCR de
+    un lote se reparte en partes iguales entre sus páginas.
+    """
+    textos_paginas = []
+    metodos_paginas = []
+    tiempos_paginas = []
+    guardadas = {}
+    nuevas = {}
+    # Páginas renderizadas que esperan su lote: (posición, índice, pixmap)
+    pendientes = []
+    (fraccion_primera, dpi_primera, _), *siguientes = etapas_lectura(
+        fraccion_recorte, escalonada
+    )
+    if ocr_lote is None or tamano_lote < 1:
+        tamano_lote = 1
+    if cache is not None:
+        try:
+            guardadas = cache.obtener()
+        except Exception:
+            # Una caché dañada o bloqueada no debe impedir leer el PDF
+            cache = None
+
+    def guardar_en_cache():
+        if cache is not None and nuevas:
+            try:
+                cache.guardar(dict(nuevas))
+            except Exception:
+                pass
+        nuevas.clear()
+
+    def leer_pendientes():
+        inicio = time.perf_counter()
+        textos_lote = ocr_lote([pix for _, _, pix in pendientes])
+        segundos = (time.perf_counter() - inicio) / len(pendientes)
+        for (posicion, pagina_num, _), texto in zip(pendientes, textos_lote):
+            tiempos_paginas[posicion]["ocr"] = segundos
+            metodo = "ocr"
+            if siguientes:
+                texto, metodo = escalar_lectura(
+                    doc.load_page(pagina_num),
+                    ocr,
+                    texto,
+                    metodo,
+                    siguientes,
+                    usar_capa_texto,
+                    preprocesar,
+                    tiempos_paginas[posicion],
+                )
+                metodos_paginas[posicion] = metodo
+            textos_paginas[posicion] = texto
+            nuevas[pagina_num] = (texto, metodo)
+        if progreso is not None:
+            progreso(len(pendientes))
+        pendientes.clear()
+
+    try:
+        if isinstance(pdf, fitz.Document):
+            doc, cerrar = pdf, False
+        else:
+            doc, cerrar = abrir_pdf(pdf), True
+        if paginas is None:
+            paginas = range(len(doc))
+        for pagina_num in paginas:
+            inicio = time.perf_counter()
+            if pagina_num in guardadas:
+                texto, metodo = guardadas[pagina_num]
+                tiempos_pagina = {"cache": time.perf_counter() - inicio}
+            else:
+                pagina = doc.load_page(pagina_num)
+                tiempos_pagina = {"lecturas": 1}
+                # Si el PDF es digital, leer el texto de la región sin OCR
+                # (la capa de texto no cuesta OCR: se lee en la fracción
+                # configurada aunque la pasada rápida renderice menos)
+                texto, pix = preparar_region(
+                    pagina,
+                    usar_capa_texto,
+                    fraccion_primera,
+                    dpi_primera,
+                    preprocesar,
+                    tiempos_pagina,
+                    fraccion_capa=fraccion_recorte,
+                )
+                metodo = "texto" if pix is None else "ocr"
+                if pix is not None and ocr_lote is not None:
+                    # El texto se completa (y se escala) al leer el lote
+                    pendientes.append((len(textos_paginas), pagina_num, pix))
+                else:
+                    if pix is not None:
+                        fin_render = time.perf_counter()
+                        texto = ocr(pix)
+                        tiempos_pagina["ocr"] = time.perf_counter() - fin_render
+                    if siguientes:
+                        # Con la capa de texto ya se leyó la fracción
+                        # configurada: solo queda la página completa
+                        texto, metodo = escalar_lectura(
+                            pagina,
+                            ocr,
+                            texto,
+                            metodo,
+                            (
+                                siguientes
+                                if pix is not None
+                                else [e for e in siguientes if e[0] > fraccion_recorte]
+                            ),
+                            usar_capa_texto,
+                            preprocesar,
+                            tiempos_pagina,
+                        )
+                    nuevas[pagina_num] = (texto, metodo)
+            textos_paginas.append(texto)
+            metodos_paginas.append(metodo)
+            tiempos_paginas.append(tiempos_pagina)
+            if progreso is not None and texto is not None:
+                progreso(1)
+            if len(pendientes) >= tamano_lote:
+                leer_pendientes()
+            if len(nuevas) >= GUARDAR_CACHE_CADA:
+                guardar_en_cache()
+        if pendientes:
+            leer_pendientes()
+        if cerrar:
+            doc.close()
+    except LecturaCancelada:
+        # Cancelar no es un error de lectura: las páginas leídas no se
+        # devuelven como si fueran el resultado completo del PDF
+        raise
+    except Exception as e:
+        if pendientes:
+            # Conservar solo las páginas anteriores al lote que no se leyó
+            del textos_paginas[pendientes[0][0] :]
+            del metodos_paginas[pendientes[0][0] :]
+            del tiempos_paginas[pendientes[0][0] :]
+        # El mensaje de algunas excepciones es vacío y no contaría como error
+        return textos_paginas, metodos_paginas, str(e) or repr(e)
+    finally:
+        guardar_en_cache()
+        if tiempos is not None:
+            tiempos.extend(tiempos_paginas)
+    return textos_paginas, metodos_paginas, None
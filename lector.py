@@ -1,46 +1,145 @@
 import pytesseract
 import fitz  # PyMuPDF
-import tkinter as tk
-from tkinter import filedialog, messagebox
-from PIL import Image
+import argparse
+import json
 import os
 import re
-import pandas as pd
-from datetime import datetime
+import sys
+import time
 import glob
+import shutil
+from cache_ocr import CacheOCR, parametros_cache
+from clasificador import clasificador
+from extraccion import FRACCION_RECORTE, contar_paginas, extraer_textos_pdf
+from manifiesto import NOMBRE_DIARIO, NOMBRE_MANIFIESTO, DiarioEjecucion, Manifiesto
+from motores_ocr import (
+    MOTORES_EASYOCR,
+    MOTORES_OCR,
+    configurar_hilos_torch,
+    configurar_tesseract,
+    hilos_torch_por_proceso,
+)
+from paralelo import (
+    UMBRAL_PAGINAS_REPARTO,
+    extraer_textos_repartidos,
+    inicializar_worker,
+    mapear_en_paralelo,
+)
+from resultados import pdf_con_paginas
+from tiempos import filas_tiempos, guardar_tiempos, resumen_lecturas, resumen_tiempos
+
+# Segundos entre revisiones de la carpeta vigilada
+INTERVALO_VIGILANCIA = 30
 
 # Configurar la ruta de Tesseract (ajusta según tu instalación)
 pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 
 
 class LectorFacturas:
-    def __init__(self):
+    def __init__(
+        self,
+        usar_capa_texto=True,
+        fraccion_recorte=FRACCION_RECORTE,
+        preprocesar=False,
+        escalonada=False,
+        workers=1,
+        umbral_paginas_reparto=UMBRAL_PAGINAS_REPARTO,
+        usar_cache_ocr=True,
+        motor_ocr="tesseract",
+        directorio_salida=None,
+        diario=None,
+        hilos_torch=None,
+    ):
         self.facturas_procesadas = []
         self.pdfs_modificados = []
+        # Motor de OCR: "tesseract" usa tesserocr si está instalado y si no
+        # pytesseract; también se puede forzar "tesserocr" o "pytesseract"
+        self.motor_ocr = motor_ocr
+        # Hilos de torch por proceso para los motores con EasyOCR (None = lo
+        # que decida torch)
+        self.hilos_torch = hilos_torch
+        configurar_hilos_torch(hilos_torch)
+        # Cantidad de procesos para procesar varios PDFs a la vez (1 = secuencial)
+        self.workers = workers
+        # PDFs con al menos estas páginas se reparten por páginas entre los procesos
+        self.umbral_paginas_reparto = umbral_paginas_reparto
+        # Fracción superior de cada página que se lee
+        self.fraccion_recorte = fraccion_recorte
+        # Leer primero la capa de texto nativa (PDFs digitales) antes de usar OCR
+        self.usar_capa_texto = usar_capa_texto
+        # Binarizar y recortar la imagen de cada región antes del OCR
+        self.preprocesar = preprocesar
+        # Leer primero una región más chica y con menos resolución, y volver a
+        # leer más solo las páginas indecisas (ver `etapas_lectura`)
+        self.escalonada = escalonada
+        # Método usado en cada página del último PDF ("texto" u "ocr")
+        self.metodos_paginas = []
+        # Segundos de cada etapa en cada página del último PDF (ver `tiempos`)
+        self.tiempos_paginas = []
+        # Caché en disco de los textos ya leídos (por contenido del PDF)
+        self.cache_ocr = CacheOCR() if usar_cache_ocr else None
+        # Carpeta donde se guardan los PDFs generados (None = carpeta actual)
+        self.directorio_salida = directorio_salida
+        # Error de la última extracción (None si se leyeron todas las páginas)
+        self.ultimo_error = None
+        # Resumen del último PDF procesado y de todos los procesados (ver
+        # `procesar_pdf_individual`)
+        self.ultimo_informe = None
+        self.informes = []
+        # Diario de la ejecución (un `DiarioEjecucion`) para poder reanudarla;
+        # None = no se registra ni se saltea nada
+        self.diario = diario
+
+    def cache_paginas(self, pdf_path):
+        """Caché de OCR de este PDF con los parámetros actuales (o None)."""
+        if self.cache_ocr is None:
+            return None
+        try:
+            return self.cache_ocr.para_pdf(
+                pdf_path,
+                self.motor_ocr,
+                self.usar_capa_texto,
+                self.fraccion_recorte,
+                self.preprocesar,
+                self.escalonada,
+            )
+        except Exception:
+            return None
 
     def extraer_texto_paginas_pdf(self, pdf_path):
-        """Extrae el texto de cada página del PDF como una lista."""
-        textos_paginas = []
-        try:
-            doc = fitz.open(pdf_path)
-            for pagina_num in range(len(doc)):
-                pagina = doc.load_page(pagina_num)
-                mat = fitz.Matrix(2.0, 2.0)
-                pix = pagina.get_pixmap(matrix=mat)
-                img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-
-                # Solo procesar el 25% superior de la imagen
-                altura = img.height
-                altura_procesar = int(altura * 0.25)
-                img_recortada = img.crop((0, 0, img.width, altura_procesar))
-
-                texto_pagina = pytesseract.image_to_string(
-                    img_recortada, lang="spa+eng", config="--psm 6 --oem 3"
-                )
-                textos_paginas.append(texto_pagina)
-            doc.close()
-        except Exception as e:
-            # print(f"Error al procesar PDF: {str(e)}")
+        """Extrae el texto de cada página del PDF como una lista.
+
+        Con varios workers, los PDFs grandes se reparten por páginas entre procesos.
+        """
+        self.tiempos_paginas = []
+        if self.workers > 1 and contar_paginas(pdf_path) >= self.umbral_paginas_reparto:
+            textos_paginas, self.metodos_paginas, error = extraer_textos_repartidos(
+                pdf_path,
+                self.motor_ocr,
+                self.workers,
+                self.usar_capa_texto,
+                self.fraccion_recorte,
+                inicializar_worker,
+                (pytesseract.pytesseract.tesseract_cmd, self.hilos_torch),
+                cache=self.cache_paginas(pdf_path),
+                tiempos=self.tiempos_paginas,
+                preprocesar=self.preprocesar,
+                escalonada=self.escalonada,
+            )
+        else:
+            textos_paginas, self.metodos_paginas, error = extraer_textos_pdf(
+                pdf_path,
+                MOTORES_OCR[self.motor_ocr],
+                self.usar_capa_texto,
+                self.fraccion_recorte,
+                cache=self.cache_paginas(pdf_path),
+                tiempos=self.tiempos_paginas,
+                preprocesar=self.preprocesar,
+                escalonada=self.escalonada,
+            )
+        self.ultimo_error = error
+        if error:
+            # print(f"Error al procesar PDF: {error}")
             pass
         return textos_paginas
 
@@ -193,178 +292,48 @@ class LectorFacturas:
 
     def es_factura(self, texto):
         """Valida si el documento es una factura con patrón específico."""
-        texto_lower = texto.lower()
-
-        # print(f"  🔍 DEBUG: Analizando texto...")
-
-        # Palabras que indican que NO es una factura
-        no_factura = [
-            "remito",
-            "orden de compra",
-            "pedido",
-            "presupuesto",
-            "cotización",
-            "proforma",
-            "documento no valido como factura",
-            "no valido como factura",
-            "no válido como factura",
-        ]
+        return clasificador.es_factura(texto)
 
-        # Verificar que NO sea un documento que no queremos
-        # Solo excluir si el documento es principalmente de ese tipo, no si contiene referencias
-        exclusion_count = sum(1 for palabra in no_factura if palabra in texto_lower)
-
-        # Si hay muchas palabras de exclusión, probablemente es ese tipo de documento
-        if exclusion_count >= 2:
-            # print(
-            #     f"  ❌ DEBUG: Excluido por contener {exclusion_count} palabras de exclusión"
-            # )
-            return False
-
-        # Verificar documentos específicos que siempre se excluyen
-        if "documento no" in texto_lower:
-            # print(f"  ❌ DEBUG: Excluido por ser documento no válido como factura")
-            return False
-
-        # Verificar si contiene "COMO FACTURA" con posibles errores de OCR
-        if (
-            "como factura" in texto_lower
-            or "cowo factura" in texto_lower
-            or "cowo factura" in texto_lower
-            or "como factura" in texto_lower
-        ) and "no es un documento valido" not in texto_lower:
-            # print(
-            #     f"  ❌ DEBUG: Excluido por contener 'COMO FACTURA' (con posibles errores de OCR)"
-            # )
-            return False
-
-        # Verificar si es principalmente un email (tiene estructura de email)
-        # Mejorar detección de emails con patrones más específicos
-        patrones_email = [
-            r"^\d{1,2}/\d{1,2}/\d{2,4},\s*\d{1,2}:\d{2}",  # Fecha y hora al inicio
-            r"correo de\s+\w+",  # "Correo de [nombre]"
-            r"fwd:\s*",  # "Fwd:"
-            r"re:\s*",  # "Re:"
-            r"para:\s*",  # "Para:"
-            r"de:\s*",  # "De:"
-            r"asunto:\s*",  # "Asunto:"
-            r"adjuntos?\s*\d*",  # "adjunto" o "adjuntos"
-            r"\d+k\s*$",  # Tamaño de archivo al final (ej: "36K")
-            r"\d+\s+mensajes?",  # "3 mensajes" o "1 mensaje"
-        ]
-
-        # Contar cuántos patrones de email se encuentran
-        patrones_email_encontrados = 0
-        for patron in patrones_email:
-            if re.search(patron, texto_lower):
-                patrones_email_encontrados += 1
-
-        # Si hay múltiples patrones de email, es muy probable que sea un email
-        if patrones_email_encontrados >= 2:
-            # print(f"  ❌ DEBUG: Excluido por ser email ({patrones_email_encontrados} patrones de email detectados)")
-            return False
-
-        # Verificar estructura específica de email con "Fwd:" o "Re:"
-        if any(palabra in texto_lower for palabra in ["fwd:", "re:", "correo de"]):
-            # print(f"  🔍 DEBUG: Detectadas palabras de email, verificando estructura...")
-            # Si contiene estructura de email, verificar si es principalmente un email
-            lineas = texto_lower.split("\n")
-            lineas_con_email = sum(
-                1
-                for linea in lineas
-                if any(
-                    palabra in linea
-                    for palabra in [
-                        "correo de",
-                        "re:",
-                        "fwd:",
-                        "para:",
-                        "de:",
-                        "asunto:",
-                        "mensaje",
-                        "escribio:",
-                        "escribió:",
-                        "adjuntos",
-                        "adjunto",
-                    ]
-                )
-            )
-
-            # Si hay estructura de email y contiene "factura" solo como referencia, es un email
-            if lineas_con_email >= 1 and "factura" in texto_lower:
-                # Verificar si "factura" aparece en contexto de email
-                if any(
-                    palabra in texto_lower
-                    for palabra in [
-                        "realizar la factura",
-                        "factura correspondiente",
-                        "enviar factura",
-                        "fwd: factura",
-                        "re: factura",
-                    ]
-                ):
-                    # print(
-                    #     f"  ❌ DEBUG: Excluido por ser email con referencia a factura ({lineas_con_email} líneas con estructura de email)"
-                    # )
-                    return False
-
-            if lineas_con_email >= 2:  # Si hay múltiples líneas con estructura de email
-                # print(
-                #     f"  ❌ DEBUG: Excluido por ser principalmente un email ({lineas_con_email} líneas con estructura de email)"
-                # )
-                return False
-
-        # Verificar si contiene "factura" o "facturas" directamente
-        if "factura" in texto_lower or "facturas" in texto_lower:
-            # print(f"  ✅ DEBUG: Encontrada palabra 'factura' o 'facturas'")
-            return True
-
-        # Debug: mostrar si contiene "facturas" en cualquier variación
-        # if "facturas" in texto:
-        #     print(f"  🔍 DEBUG: Encontrada 'FACTURAS' en texto original")
-        # if "facturas" in texto_lower:
-        #     print(f"  🔍 DEBUG: Encontrada 'facturas' en texto en minúsculas")
-
-        # Patrón específico para factura: "FACTURA N°: 0003-00016403"
-        patrones_factura = [
-            r"factura\s+n[°º]?\s*:\s*\d+-\d+",  # FACTURA N°: 0003-00016403
-            r"factura\s+n[°º]?\s*\d+-\d+",  # FACTURA N° 0003-00016403
-            r"factura\s+n[°º]?\s*:\s*\d+/\d+",  # FACTURA N°: 0003/00016403
-            r"factura\s+n[°º]?\s*\d+/\d+",  # FACTURA N° 0003/00016403
-            r"punto de venta\s*:\s*\d+\s+comp\.?nro\s*:\s*\d+",  # Punto de Venta: 00004 Comp.Nro: 00006772
-            r"punto de venta\s*:\s*\d+\s+comp\s*nro\s*:\s*\d+",  # Punto de Venta: 00004 Comp Nro: 00006772
-            r"cod\.\s*\d+",  # COD. 01
-            r"codigo\s*\d+",  # CODIGO 01
-            r"cod\.\s*n[°º]?\s*\d+",  # Cod.N° 01
-            r"cod\s*n[°º]?\s*\d+",  # Cod N° 01 (sin punto)
-            r"cod\.\s*n\s*\d+",  # Cod.N 01 (sin símbolo)
-            r"cod\s*n\s*\d+",  # Cod N 01 (sin punto ni símbolo)
-            r"cod\.\s*n[°º]?\s*\d+\s*\w*",  # Cod.N° 01 jo (con caracteres extra)
-            r"cod\s*n[°º]?\s*\d+\s*\w*",  # Cod N° 01 jo (sin punto, con caracteres extra)
-            r"céd\.\s*\d+",  # Céd. 01
-            r"céd\s*\d+",  # Céd 01 (sin punto)
-            r"empresa distribuidora y comercializadora norte s\.a\.",  # Empresa Distribuidora y Comercializadora Norte S.A.
-            r"amx argentina s\.a",  # AMX ARGENTINA S.A
-        ]
-
-        # Buscar el patrón específico
-        for i, patron in enumerate(patrones_factura):
-            if re.search(patron, texto_lower):
-                # print(f"  ✅ DEBUG: Patrón {i+1} encontrado")
-                return True
-
-        # print(f"  ❌ DEBUG: No se encontró ningún patrón de factura")
-        return False
+    def clasificar_pagina(self, texto):
+        """Clasifica la página y devuelve la `Decision` (con la regla que decidió)."""
+        return clasificador.clasificar(texto)
 
     def procesar_pdf_individual(self, pdf_path, numero_orden):
-        """Procesa un PDF individual y extrae solo las páginas que son facturas."""
+        """Procesa un PDF individual y extrae solo las páginas que son facturas.
+
+        Deja en `ultimo_informe` un resumen del PDF (decisión y método de cada
+        página, tiempos por etapa del PDF y de cada página, y error) que se
+        puede escribir como JSON.
+        """
         # print(f"\n{'='*60}")
         # print(f"PROCESANDO PDF {numero_orden}: {os.path.basename(pdf_path)}")
         # print(f"{'='*60}")
 
+        inicio = time.perf_counter()
+        informe = self.ultimo_informe = {
+            "orden": numero_orden,
+            "pdf": pdf_path,
+            "salida": None,
+            "paginas": 0,
+            "paginas_facturas": [],
+            "metodos": [],
+            "reglas": [],
+            "segundos": {},
+            "tiempos_paginas": [],
+            "error": None,
+            "reanudado": False,
+        }
+
         textos_paginas = self.extraer_texto_paginas_pdf(pdf_path)
+        informe["segundos"]["extraccion"] = round(time.perf_counter() - inicio, 4)
+        informe["paginas"] = len(textos_paginas)
+        informe["metodos"] = self.metodos_paginas
+        informe["tiempos_paginas"] = self.tiempos_paginas
+        informe["error"] = self.ultimo_error
         if not textos_paginas:
             # print("No se pudo extraer texto del PDF.")
+            informe["error"] = self.ultimo_error or "No se pudo extraer texto del PDF."
+            informe["segundos"]["total"] = round(time.perf_counter() - inicio, 4)
             return None
 
         # Lista para guardar índices de páginas que son facturas
@@ -377,25 +346,50 @@ class LectorFacturas:
             # print(texto)
             # print("-" * 30)
 
-            if self.es_factura(texto):
+            inicio_pagina = time.perf_counter()
+            decision = self.clasificar_pagina(texto)
+            self.tiempos_paginas[idx]["clasificacion"] = (
+                time.perf_counter() - inicio_pagina
+            )
+            informe["reglas"].append(decision.regla)
+            if decision.es_factura:
                 # print(f"✅ PÁGINA {idx+1}: CONTIENE FACTURA")
                 paginas_facturas.append(idx)
             else:
                 # print(f"❌ PÁGINA {idx+1}: NO es factura")
                 pass
+        informe["paginas_facturas"] = [idx + 1 for idx in paginas_facturas]
+        fin_clasificacion = time.perf_counter()
+        informe["segundos"]["clasificacion"] = round(
+            fin_clasificacion - inicio - informe["segundos"]["extraccion"], 4
+        )
 
         # Si hay páginas de facturas, crear nuevo PDF
         if paginas_facturas:
             nuevo_pdf_path = self.crear_pdf_solo_facturas(
                 pdf_path, paginas_facturas, numero_orden
             )
-            return nuevo_pdf_path
         else:
             # print(f"⚠️ No se encontraron facturas en {os.path.basename(pdf_path)}")
             # print(f"📄 Manteniendo PDF original intacto...")
             # Crear una copia del PDF original con el prefijo de orden
             nuevo_pdf_path = self.crear_copia_pdf_original(pdf_path, numero_orden)
-            return nuevo_pdf_path
+
+        informe["salida"] = nuevo_pdf_path
+        if nuevo_pdf_path is None:
+            informe["error"] = (
+                informe["error"] or "No se pudo guardar el PDF de salida."
+            )
+        fin = time.perf_counter()
+        informe["segundos"]["salida"] = round(fin - fin_clasificacion, 4)
+        informe["segundos"]["total"] = round(fin - inicio, 4)
+        for tiempos_pagina in self.tiempos_paginas:
+            tiempos_pagina["salida"] = (fin - fin_clasificacion) / len(textos_paginas)
+        informe["tiempos_paginas"] = [
+            {etapa: round(segundos, 6) for etapa, segundos in tiempos_pagina.items()}
+            for tiempos_pagina in self.tiempos_paginas
+        ]
+        return nuevo_pdf_path
 
     def crear_pdf_solo_facturas(self, pdf_original, paginas_facturas, numero_orden):
         """Crea un nuevo PDF con solo las páginas que son facturas."""
@@ -403,23 +397,15 @@ class LectorFacturas:
             # Abrir PDF original
             doc_original = fitz.open(pdf_original)
 
-            # Crear nuevo PDF
-            doc_nuevo = fitz.open()
-
-            # Copiar solo las páginas que son facturas
-            for pagina_idx in paginas_facturas:
-                doc_nuevo.insert_pdf(
-                    doc_original, from_page=pagina_idx, to_page=pagina_idx
-                )
-
             # Generar nombre del nuevo archivo
             nombre_base = os.path.basename(pdf_original)
             nuevo_nombre = f"{numero_orden:03d}_{nombre_base}"
-            nuevo_path = os.path.join(os.getcwd(), nuevo_nombre)
+            nuevo_path = os.path.join(
+                self.directorio_salida or os.getcwd(), nuevo_nombre
+            )
 
-            # Guardar nuevo PDF
-            doc_nuevo.save(nuevo_path)
-            doc_nuevo.close()
+            # Guardar solo las páginas que son facturas
+            pdf_con_paginas(doc_original, paginas_facturas, nuevo_path)
             doc_original.close()
 
             # print(f"✅ PDF creado: {nuevo_nombre}")
@@ -430,26 +416,17 @@ class LectorFacturas:
             return None
 
     def crear_copia_pdf_original(self, pdf_original, numero_orden):
-        """Crea una copia del PDF original con prefijo de orden."""
+        """Crea una copia del PDF original con prefijo de orden (byte por byte)."""
         try:
-            # Abrir PDF original
-            doc_original = fitz.open(pdf_original)
-
-            # Crear nuevo PDF
-            doc_nuevo = fitz.open()
-
-            # Copiar todas las páginas del PDF original
-            doc_nuevo.insert_pdf(doc_original)
-
             # Generar nombre del nuevo archivo
             nombre_base = os.path.basename(pdf_original)
             nuevo_nombre = f"{numero_orden:03d}_{nombre_base}"
-            nuevo_path = os.path.join(os.getcwd(), nuevo_nombre)
+            nuevo_path = os.path.join(
+                self.directorio_salida or os.getcwd(), nuevo_nombre
+            )
 
-            # Guardar nuevo PDF
-            doc_nuevo.save(nuevo_path)
-            doc_nuevo.close()
-            doc_original.close()
+            # Copiar el archivo tal cual, sin volver a generar el PDF
+            shutil.copyfile(pdf_original, nuevo_path)
 
             # print(f"✅ PDF original copiado: {nuevo_nombre}")
             return nuevo_path
@@ -458,6 +435,88 @@ class LectorFacturas:
             # print(f"❌ Error al copiar PDF original: {str(e)}")
             return None
 
+    def opciones_worker(self):
+        """Opciones con las que se crea el lector en cada proceso del pool."""
+        return {
+            "usar_capa_texto": self.usar_capa_texto,
+            "fraccion_recorte": self.fraccion_recorte,
+            "preprocesar": self.preprocesar,
+            "escalonada": self.escalonada,
+            "motor_ocr": self.motor_ocr,
+            "usar_cache_ocr": self.cache_ocr is not None,
+            "directorio_salida": self.directorio_salida,
+        }
+
+    def procesar_pdfs(self, pdfs, al_terminar=None, numeros=None):
+        """Procesa los PDFs en orden, numerándolos desde 1 (o con `numeros`).
+
+        Con varios workers, los PDFs chicos se procesan en un pool de procesos.
+        El informe de cada PDF se agrega a `informes` y, si se indica, se pasa
+        a `al_terminar` en el orden de los PDFs.
+        Con `diario`, cada PDF se registra apenas termina (también los del
+        pool, aunque terminen fuera de orden) y los que ya terminaron en una
+        ejecución anterior no se vuelven a procesar: se reutiliza su salida y
+        su informe (con "reanudado": true).
+        """
+        if numeros is None:
+            numeros = range(1, len(pdfs) + 1)
+        numerados = list(zip(numeros, pdfs))
+
+        terminados = {}
+        if self.diario is not None:
+            for i, pdf_path in numerados:
+                informe = self.diario.terminado(pdf_path, i)
+                if informe is not None:
+                    terminados[i] = informe
+            numerados_pendientes = [
+                (i, pdf_path) for i, pdf_path in numerados if i not in terminados
+            ]
+        else:
+            numerados_pendientes = numerados
+
+        resultados_pool = {}
+        if self.workers > 1:
+            # Cada proceso recibe el número de orden del PDF, así los nombres
+            # y el orden de los resultados son los mismos que en secuencial.
+            # Los PDFs grandes no van al pool: se reparten por páginas.
+            tareas = [
+                (pdf_path, i, self.opciones_worker())
+                for i, pdf_path in numerados_pendientes
+                if contar_paginas(pdf_path) < self.umbral_paginas_reparto
+            ]
+            resultados = mapear_en_paralelo(
+                _procesar_pdf_en_worker,
+                tareas,
+                self.workers,
+                inicializar_worker,
+                (pytesseract.pytesseract.tesseract_cmd, self.hilos_torch),
+                al_terminar=(
+                    None
+                    if self.diario is None
+                    else lambda resultado: self.diario.registrar(resultado[1])
+                ),
+            )
+            resultados_pool = {
+                tarea[1]: resultado for tarea, resultado in zip(tareas, resultados)
+            }
+
+        for i, pdf_path in numerados:
+            if i in terminados:
+                informe = terminados.pop(i)
+                nuevo_pdf = informe["salida"]
+            elif i in resultados_pool:
+                nuevo_pdf, informe = resultados_pool.pop(i)
+            else:
+                nuevo_pdf = self.procesar_pdf_individual(pdf_path, i)
+                informe = self.ultimo_informe
+                if self.diario is not None:
+                    self.diario.registrar(informe)
+            if nuevo_pdf:
+                self.pdfs_modificados.append(nuevo_pdf)
+            self.informes.append(informe)
+            if al_terminar is not None:
+                al_terminar(informe)
+
     def procesar_carpeta(self, carpeta_path):
         """Procesa una carpeta que contiene PDFs."""
         # print(f"\n{'='*60}")
@@ -480,10 +539,7 @@ class LectorFacturas:
             # print()
 
             # Procesar cada PDF
-            for i, pdf_path in enumerate(pdfs_en_carpeta, 1):
-                nuevo_pdf = self.procesar_pdf_individual(pdf_path, i)
-                if nuevo_pdf:
-                    self.pdfs_modificados.append(nuevo_pdf)
+            self.procesar_pdfs(pdfs_en_carpeta)
 
             # print(f"\n{'='*60}")
             # print(f"RESUMEN: Se procesaron {len(pdfs_en_carpeta)} PDFs")
@@ -494,9 +550,56 @@ class LectorFacturas:
             # print(f"❌ Error al procesar carpeta: {str(e)}")
             pass
 
+    def vigilar_carpeta(
+        self,
+        carpeta_path,
+        manifiesto,
+        intervalo=INTERVALO_VIGILANCIA,
+        al_terminar=None,
+        una_vez=False,
+    ):
+        """Procesa los PDFs nuevos o modificados de la carpeta cada `intervalo` segundos.
+
+        `manifiesto` (un `Manifiesto`) indica qué PDFs ya se procesaron y con qué
+        número de orden, así cada revisión solo procesa lo nuevo y los nombres de
+        salida no cambian entre ejecuciones. Con `una_vez` hace una sola revisión
+        (por ejemplo, para correrlo desde cron). Un error en una revisión (un
+        archivo que desapareció, un proceso del pool que murió) se informa y
+        se sigue con la próxima; solo se termina con Ctrl+C.
+        """
+        while True:
+            try:
+                pendientes = manifiesto.pendientes(carpeta_path)
+                if pendientes:
+                    por_pdf = {pendiente.pdf: pendiente for pendiente in pendientes}
+
+                    def registrar(informe):
+                        manifiesto.registrar_procesado(por_pdf[informe["pdf"]], informe)
+                        if al_terminar is not None:
+                            al_terminar(informe)
+
+                    self.procesar_pdfs(
+                        [pendiente.pdf for pendiente in pendientes],
+                        registrar,
+                        [pendiente.orden for pendiente in pendientes],
+                    )
+            except Exception as e:
+                print(
+                    f"Error al revisar {carpeta_path}: {str(e) or repr(e)}",
+                    file=sys.stderr,
+                )
+            if una_vez:
+                return
+            time.sleep(intervalo)
+
     def seleccionar_carpeta(self):
         """Permite al usuario seleccionar una carpeta."""
         try:
+            # tkinter solo se importa en el modo con ventana (no hace falta en
+            # servidores sin pantalla)
+            import tkinter as tk
+            from tkinter import filedialog
+
             root = tk.Tk()
             root.withdraw()
 
@@ -548,6 +651,250 @@ class LectorFacturas:
             pass
 
 
+def _procesar_pdf_en_worker(pdf_path, numero_orden, opciones):
+    """Procesa un PDF dentro de un proceso del pool (debe estar a nivel de módulo).
+
+    Devuelve (PDF generado, informe del PDF).
+    """
+    lector = LectorFacturas(**opciones)
+    nuevo_pdf = lector.procesar_pdf_individual(pdf_path, numero_orden)
+    return nuevo_pdf, lector.ultimo_informe
+
+
+def filas_tiempos_informes(informes):
+    """Reporte de tiempos por página de los PDFs procesados en esta ejecución.
+
+    Los reanudados del diario no se incluyen: no se procesaron ahora.
+    """
+    filas = []
+    for informe in informes:
+        if not informe["reanudado"]:
+            filas.extend(
+                filas_tiempos(
+                    informe["orden"],
+                    informe["pdf"],
+                    informe["metodos"],
+                    informe["tiempos_paginas"],
+                    [pagina - 1 for pagina in informe["paginas_facturas"]],
+                )
+            )
+    return filas
+
+
+def listar_pdfs(entradas):
+    """PDFs de las entradas (carpetas, archivos o patrones glob), en orden y sin repetir.
+
+    De cada carpeta se toman sus PDFs en orden alfabético, igual que en
+    `procesar_carpeta`.
+    """
+    pdfs = []
+    vistos = set()
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            encontrados = sorted(glob.glob(os.path.join(entrada, "*.pdf")))
+        elif os.path.isfile(entrada):
+            encontrados = [entrada]
+        else:
+            encontrados = sorted(glob.glob(entrada, recursive=True))
+        for pdf_path in encontrados:
+            clave = os.path.abspath(pdf_path)
+            if os.path.isfile(pdf_path) and clave not in vistos:
+                vistos.add(clave)
+                pdfs.append(pdf_path)
+    return pdfs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Extrae las páginas de facturas de PDFs. Sin entradas abre "
+        "el selector de carpetas."
+    )
+    parser.add_argument(
+        "entradas",
+        nargs="*",
+        metavar="ENTRADA",
+        help="carpetas, PDFs o patrones glob (ej: 'facturas/**/*.pdf')",
+    )
+    parser.add_argument(
+        "--salida", default=os.getcwd(), help="carpeta de los PDFs generados"
+    )
+    parser.add_argument("--workers", type=int, default=1, help="procesos en paralelo")
+    parser.add_argument(
+        "--motor", choices=sorted(MOTORES_OCR), default="tesseract", help="motor de OCR"
+    )
+    parser.add_argument(
+        "--hilos-ocr",
+        type=int,
+        help="hilos de torch por proceso con los motores de EasyOCR (por "
+        "defecto, los núcleos repartidos entre los procesos)",
+    )
+    parser.add_argument(
+        "--fraccion",
+        type=float,
+        default=FRACCION_RECORTE,
+        help="fracción superior de cada página que se lee",
+    )
+    parser.add_argument(
+        "--sin-capa-texto",
+        action="store_true",
+        help="usar OCR aunque el PDF tenga texto",
+    )
+    parser.add_argument(
+        "--preprocesar",
+        action="store_true",
+        help="normalizar el contraste, binarizar y recortar los bordes de cada "
+        "región escaneada antes del OCR",
+    )
+    parser.add_argument(
+        "--escalonada",
+        action="store_true",
+        help="leer primero una región más chica con menos resolución y volver a "
+        "leer la fracción indicada solo las páginas indecisas (y la página "
+        "completa si esa región está casi vacía)",
+    )
+    parser.add_argument(
+        "--sin-cache", action="store_true", help="no usar la caché de OCR en disco"
+    )
+    parser.add_argument(
+        "--tesseract-cmd",
+        help="ejecutable de Tesseract (por defecto, el configurado arriba o "
+        "'tesseract' del PATH si ese no existe)",
+    )
+    parser.add_argument(
+        "--vigilar",
+        action="store_true",
+        help="vigilar la carpeta de entrada y procesar solo los PDFs nuevos o modificados",
+    )
+    parser.add_argument(
+        "--una-vez",
+        action="store_true",
+        help="con --vigilar, revisar la carpeta una sola vez y terminar (para cron)",
+    )
+    parser.add_argument(
+        "--intervalo",
+        type=float,
+        default=INTERVALO_VIGILANCIA,
+        help="con --vigilar, segundos entre revisiones",
+    )
+    parser.add_argument(
+        "--manifiesto",
+        help="con --vigilar, archivo con los PDFs ya procesados "
+        f"(por defecto, {NOMBRE_MANIFIESTO} en la carpeta de salida)",
+    )
+    parser.add_argument(
+        "--diario",
+        help="archivo donde se registran los PDFs terminados para reanudar una "
+        f"ejecución cortada (por defecto, {NOMBRE_DIARIO} en la carpeta de salida)",
+    )
+    parser.add_argument(
+        "--desde-cero",
+        action="store_true",
+        help="descartar el diario y volver a procesar todos los PDFs",
+    )
+    parser.add_argument(
+        "--tiempos",
+        help="archivo donde guardar los tiempos por etapa de cada página "
+        "(JSON si termina en .json, si no CSV); el resumen se muestra al final",
+    )
+    parser.add_argument(
+        "--resumen",
+        default="-",
+        help="archivo donde escribir el resumen JSON lines ('-' = salida estándar)",
+    )
+    args = parser.parse_args(argv)
+
+    if not args.entradas:
+        lector = LectorFacturas()
+        lector.ejecutar()
+        return 0
+
+    if args.tesseract_cmd:
+        configurar_tesseract(args.tesseract_cmd)
+    elif not os.path.exists(pytesseract.pytesseract.tesseract_cmd):
+        configurar_tesseract("tesseract")
+
+    if args.vigilar and (
+        len(args.entradas) != 1 or not os.path.isdir(args.entradas[0])
+    ):
+        parser.error("--vigilar necesita una sola carpeta de entrada")
+
+    pdfs = [] if args.vigilar else listar_pdfs(args.entradas)
+    if not args.vigilar and not pdfs:
+        print("No se encontraron PDFs en las entradas.", file=sys.stderr)
+        return 1
+    os.makedirs(args.salida, exist_ok=True)
+
+    lector = LectorFacturas(
+        usar_capa_texto=not args.sin_capa_texto,
+        fraccion_recorte=args.fraccion,
+        preprocesar=args.preprocesar,
+        escalonada=args.escalonada,
+        workers=args.workers,
+        usar_cache_ocr=not args.sin_cache,
+        motor_ocr=args.motor,
+        directorio_salida=args.salida,
+        hilos_torch=(
+            args.hilos_ocr or hilos_torch_por_proceso(args.workers)
+            if args.motor in MOTORES_EASYOCR
+            else None
+        ),
+    )
+    if not args.vigilar:
+        # En modo vigilar el manifiesto ya cumple esta función
+        lector.diario = DiarioEjecucion(
+            args.diario or os.path.join(args.salida, NOMBRE_DIARIO),
+            parametros_cache(
+                args.motor,
+                not args.sin_capa_texto,
+                args.fraccion,
+                args.preprocesar,
+                args.escalonada,
+            ),
+            args.desde_cero,
+        )
+
+    resumen = sys.stdout if args.resumen == "-" else open(args.resumen, "w")
+    try:
+        # Una línea JSON por PDF, apenas se termina de procesar
+        def escribir_informe(informe):
+            resumen.write(json.dumps(informe, ensure_ascii=False) + "\n")
+            resumen.flush()
+
+        if args.vigilar:
+            manifiesto = Manifiesto(
+                args.manifiesto or os.path.join(args.salida, NOMBRE_MANIFIESTO)
+            )
+            lector.vigilar_carpeta(
+                args.entradas[0],
+                manifiesto,
+                args.intervalo,
+                escribir_informe,
+                args.una_vez,
+            )
+        else:
+            lector.procesar_pdfs(pdfs, escribir_informe)
+    finally:
+        if resumen is not sys.stdout:
+            resumen.close()
+        if args.tiempos:
+            filas = filas_tiempos_informes(lector.informes)
+            guardar_tiempos(filas, args.tiempos)
+            for etapa in resumen_tiempos(filas):
+                print(
+                    f"{etapa['etapa']:14} {etapa['paginas']:6d} páginas "
+                    f"{etapa['segundos']:10.3f} s {etapa['ms_por_pagina']:10.3f} "
+                    f"ms/página {etapa['porcentaje']:5.1f} %",
+                    file=sys.stderr,
+                )
+            lecturas = resumen_lecturas(filas)
+            if any(veces > 1 for veces in lecturas):
+                detalle = ", ".join(
+                    f"{paginas} con {veces}" for veces, paginas in lecturas.items()
+                )
+                print(f"Lecturas por página: {detalle}", file=sys.stderr)
+
+    return 1 if any(informe["error"] for informe in lector.informes) else 0
+
+
 if __name__ == "__main__":
-    lector = LectorFacturas()
-    lector.ejecutar()
+    sys.exit(main())
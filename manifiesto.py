@@ -0,0 +1,193 @@
+import json
+import os
+import time
+from collections import namedtuple
+
+from cache_ocr import hash_archivo
+
+# Nombres del manifiesto y del diario dentro de la carpeta de salida
+NOMBRE_MANIFIESTO = ".lector_manifiesto.jsonl"
+NOMBRE_DIARIO = ".lector_diario.jsonl"
+
+# Un PDF modificado hace menos de estos segundos se deja para la próxima
+# revisión (el escáner puede estar escribiéndolo todavía)
+ESPERA_ARCHIVO_ESTABLE = 5
+
+# PDF nuevo o modificado que hay que procesar, con el número de orden asignado
+PdfPendiente = namedtuple(
+    "PdfPendiente", ["pdf", "orden", "tamano", "modificado", "hash"]
+)
+
+
+class Manifiesto:
+    """Registro de los PDFs ya procesados de una carpeta vigilada.
+
+    Es un archivo JSON lines: por cada PDF procesado se agrega una línea con su
+    nombre, tamaño, fecha de modificación, hash, número de orden y salida, sin
+    reescribir el archivo. Al abrirlo, la última línea de cada nombre es la
+    vigente. Un PDF conserva su número de orden aunque se modifique, así el
+    nombre de su salida no cambia; los nuevos reciben el siguiente número.
+    Los PDFs que terminaron con error quedan registrados con su número pero
+    siguen pendientes: se reintentan en cada revisión.
+    """
+
+    def __init__(self, ruta, espera=ESPERA_ARCHIVO_ESTABLE):
+        self.ruta = ruta
+        self.espera = espera
+        self.entradas = {}
+        self.ultimo_orden = 0
+        if os.path.exists(ruta):
+            with open(ruta, encoding="utf-8") as archivo:
+                for linea in archivo:
+                    try:
+                        entrada = json.loads(linea)
+                    except ValueError:
+                        # Línea incompleta (el proceso se cortó mientras escribía)
+                        continue
+                    self.entradas[entrada["nombre"]] = entrada
+                    self.ultimo_orden = max(self.ultimo_orden, entrada["orden"])
+
+    def pendientes(self, carpeta_path):
+        """PDFs de la carpeta nuevos, que cambiaron desde que se procesaron o que
+        dieron error, por orden.
+
+        Solo se calcula el hash de los PDFs cuyo tamaño o fecha de modificación
+        no coincide con el manifiesto; si el contenido es el mismo, se actualiza
+        el registro sin volver a procesarlos.
+        """
+        pendientes = []
+        ahora = time.time()
+        for nombre in sorted(os.listdir(carpeta_path)):
+            pdf_path = os.path.join(carpeta_path, nombre)
+            if not nombre.endswith(".pdf") or not os.path.isfile(pdf_path):
+                continue
+            estado = os.stat(pdf_path)
+            if ahora - estado.st_mtime < self.espera:
+                continue
+
+            entrada = self.entradas.get(nombre)
+            if entrada is not None and entrada.get("error"):
+                # Un error puede ser pasajero (OCR, falta de memoria): se
+                # reintenta con el mismo número de orden
+                pendientes.append(
+                    PdfPendiente(
+                        pdf_path,
+                        entrada["orden"],
+                        estado.st_size,
+                        estado.st_mtime_ns,
+                        hash_archivo(pdf_path),
+                    )
+                )
+                continue
+            if (
+                entrada is not None
+                and entrada["tamano"] == estado.st_size
+                and entrada["modificado"] == estado.st_mtime_ns
+            ):
+                continue
+
+            hash_pdf = hash_archivo(pdf_path)
+            if entrada is not None and entrada["hash"] == hash_pdf:
+                self.registrar(
+                    nombre,
+                    dict(entrada, tamano=estado.st_size, modificado=estado.st_mtime_ns),
+                )
+                continue
+
+            if entrada is not None:
+                orden = entrada["orden"]
+            else:
+                self.ultimo_orden += 1
+                orden = self.ultimo_orden
+            pendientes.append(
+                PdfPendiente(
+                    pdf_path, orden, estado.st_size, estado.st_mtime_ns, hash_pdf
+                )
+            )
+        return sorted(pendientes, key=lambda pendiente: pendiente.orden)
+
+    def registrar(self, nombre, entrada):
+        """Agrega la entrada de un PDF al manifiesto (reemplaza la anterior)."""
+        entrada = dict(entrada, nombre=nombre)
+        self.entradas[nombre] = entrada
+        if os.path.dirname(self.ruta):
+            os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+        with open(self.ruta, "a", encoding="utf-8") as archivo:
+            archivo.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+
+    def registrar_procesado(self, pendiente, informe):
+        """Registra un PDF pendiente ya procesado, con su salida y error."""
+        self.registrar(
+            os.path.basename(pendiente.pdf),
+            {
+                "orden": pendiente.orden,
+                "tamano": pendiente.tamano,
+                "modificado": pendiente.modificado,
+                "hash": pendiente.hash,
+                "salida": informe["salida"],
+                "error": informe["error"],
+            },
+        )
+
+
+class DiarioEjecucion:
+    """Diario de los PDFs terminados en una ejecución, para poder reanudarla.
+
+    Por cada PDF terminado se agrega una línea con su informe, su tamaño, su
+    fecha de modificación y los parámetros de lectura. Si la ejecución se corta,
+    al volver a correrla se saltean los PDFs que terminaron sin error, siguen
+    iguales, conservan su número de orden y cuya salida todavía existe.
+    """
+
+    def __init__(self, ruta, parametros, desde_cero=False):
+        self.ruta = ruta
+        self.parametros = parametros
+        self.entradas = {}
+        if desde_cero and os.path.exists(ruta):
+            os.remove(ruta)
+        elif os.path.exists(ruta):
+            with open(ruta, encoding="utf-8") as archivo:
+                for linea in archivo:
+                    try:
+                        entrada = json.loads(linea)
+                    except ValueError:
+                        # Línea incompleta (el proceso se cortó mientras escribía)
+                        continue
+                    self.entradas[entrada["pdf"]] = entrada
+
+    def terminado(self, pdf_path, orden):
+        """Informe del PDF si ya terminó en una ejecución anterior, o None."""
+        entrada = self.entradas.get(os.path.abspath(pdf_path))
+        if entrada is None:
+            return None
+        informe = entrada["informe"]
+        estado = os.stat(pdf_path)
+        if (
+            entrada["parametros"] != self.parametros
+            or entrada["tamano"] != estado.st_size
+            or entrada["modificado"] != estado.st_mtime_ns
+            or informe["orden"] != orden
+            or informe["error"]
+            or not informe["salida"]
+            or not os.path.exists(informe["salida"])
+        ):
+            return None
+        return dict(informe, reanudado=True)
+
+    def registrar(self, informe):
+        """Agrega el informe de un PDF terminado y lo baja a disco."""
+        estado = os.stat(informe["pdf"])
+        entrada = {
+            "pdf": os.path.abspath(informe["pdf"]),
+            "tamano": estado.st_size,
+            "modificado": estado.st_mtime_ns,
+            "parametros": self.parametros,
+            "informe": informe,
+        }
+        self.entradas[entrada["pdf"]] = entrada
+        if os.path.dirname(self.ruta):
+            os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+        with open(self.ruta, "a", encoding="utf-8") as archivo:
+            archivo.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+            archivo.flush()
+            os.fsync(archivo.fileno())
@@ -0,0 +1,310 @@
+import importlib.util
+import os
+import threading
+from functools import lru_cache
+
+from extraccion import cajas_renglones, pixmap_a_array
+
+# Los motores se importan al usarlos: cada aplicación instala solo el suyo
+# (pytesseract/tesserocr en app.py y lector.py, easyocr en app_easyocr.py).
+
+# Idiomas y modo de Tesseract (equivalen a lang="spa+eng", "--psm 6 --oem 3")
+IDIOMAS_TESSERACT = "spa+eng"
+PSM_TESSERACT = 6
+OEM_TESSERACT = 3
+
+# Cascada: las páginas cuya lectura de Tesseract tiene una confianza media
+# (0-100, por palabra) menor que esta se vuelven a leer con EasyOCR
+UMBRAL_CONFIANZA_CASCADA = 60
+
+# Páginas que se pasan juntas a EasyOCR y líneas de texto por lote del reconocedor
+TAMANO_LOTE_EASYOCR = 8
+LOTE_RECONOCEDOR_EASYOCR = 32
+
+# En CPU, EasyOCR cuantiza dinámicamente a int8 los pesos de las capas
+# Linear y LSTM (el reconocedor); el detector (CRAFT) son convoluciones, que
+# la cuantización dinámica no cubre, y sigue en float32. Se pide explícito
+# para no depender del valor por defecto de EasyOCR
+CUANTIZAR_EASYOCR = True
+
+# Readers de EasyOCR de este proceso, por cuantización (se crean la primera
+# vez que se usan). En Streamlit los comparten todas las sesiones: los
+# modelos se cargan una sola vez
+_readers_easyocr = {}
+_lock_creacion_easyocr = threading.Lock()
+
+# Las sesiones usan el reader de a una: cada lectura ya usa todos los hilos de
+# torch, y así el uso de memoria no crece con la cantidad de usuarios
+_lock_easyocr = threading.Lock()
+
+# API de tesserocr de cada hilo: no es thread-safe y las sesiones de Streamlit
+# corren en hilos distintos
+_local_tesserocr = threading.local()
+
+
+def configurar_tesseract(tesseract_cmd):
+    """Define la ruta del ejecutable de Tesseract en este proceso."""
+    if tesseract_cmd:
+        import pytesseract
+
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+
+def ocr_pytesseract(pix):
+    """Extrae el texto del pixmap con pytesseract (un proceso tesseract por página)."""
+    import pytesseract
+
+    return pytesseract.image_to_string(
+        pixmap_a_array(pix),
+        lang=IDIOMAS_TESSERACT,
+        config=f"--psm {PSM_TESSERACT} --oem {OEM_TESSERACT}",
+    )
+
+
+def ocr_pytesseract_confianza(pix):
+    """Texto y confianza media de las palabras (0-100) con pytesseract.
+
+    El texto se arma con las palabras de `image_to_data`, una línea por cada
+    línea que detecta Tesseract, así basta una sola pasada para las dos cosas.
+    """
+    import pytesseract
+
+    datos = pytesseract.image_to_data(
+        pixmap_a_array(pix),
+        lang=IDIOMAS_TESSERACT,
+        config=f"--psm {PSM_TESSERACT} --oem {OEM_TESSERACT}",
+        output_type=pytesseract.Output.DICT,
+    )
+    lineas = {}
+    confianzas = []
+    for palabra, confianza, bloque, parrafo, linea in zip(
+        datos["text"],
+        datos["conf"],
+        datos["block_num"],
+        datos["par_num"],
+        datos["line_num"],
+    ):
+        if not palabra.strip():
+            continue
+        lineas.setdefault((bloque, parrafo, linea), []).append(palabra)
+        if float(confianza) >= 0:
+            confianzas.append(float(confianza))
+    texto = "\n".join(" ".join(palabras) for palabras in lineas.values())
+    return texto, sum(confianzas) / len(confianzas) if confianzas else 0.0
+
+
+@lru_cache(maxsize=None)
+def tesserocr_disponible():
+    """Indica si tesserocr (API de Tesseract en el mismo proceso) está instalado."""
+    try:
+        import tesserocr  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def obtener_api_tesserocr():
+    """Devuelve la API de Tesseract de este hilo, cargando los modelos una sola vez."""
+    api = getattr(_local_tesserocr, "api", None)
+    if api is None:
+        import tesserocr
+
+        api = tesserocr.PyTessBaseAPI(
+            lang=IDIOMAS_TESSERACT,
+            psm=PSM_TESSERACT,
+            oem=OEM_TESSERACT,
+        )
+        _local_tesserocr.api = api
+    return api
+
+
+def ocr_tesserocr(pix):
+    """Extrae el texto del pixmap con la API persistente de Tesseract.
+
+    Los píxeles del pixmap se pasan directamente, sin archivo temporal ni un
+    proceso tesseract nuevo por página.
+    """
+    api = obtener_api_tesserocr()
+    api.SetImageBytes(pix.samples, pix.width, pix.height, pix.n, pix.stride)
+    return api.GetUTF8Text()
+
+
+def ocr_tesserocr_confianza(pix):
+    """Texto y confianza media de las palabras (0-100) con tesserocr."""
+    texto = ocr_tesserocr(pix)
+    return texto, obtener_api_tesserocr().MeanTextConf()
+
+
+def ocr_tesseract(pix):
+    """Extrae el texto del pixmap con Tesseract.
+
+    Usa la API persistente (tesserocr) si está instalada; si no, pytesseract.
+    """
+    if tesserocr_disponible():
+        return ocr_tesserocr(pix)
+    return ocr_pytesseract(pix)
+
+
+def ocr_tesseract_confianza(pix):
+    """Como `ocr_tesseract`, pero devuelve (texto, confianza media 0-100)."""
+    if tesserocr_disponible():
+        return ocr_tesserocr_confianza(pix)
+    return ocr_pytesseract_confianza(pix)
+
+
+@lru_cache(maxsize=None)
+def easyocr_disponible():
+    """Indica si EasyOCR está instalado (sin importarlo: carga torch)."""
+    return importlib.util.find_spec("easyocr") is not None
+
+
+def obtener_reader_easyocr(cuantizar=CUANTIZAR_EASYOCR):
+    """Devuelve el reader de EasyOCR de este proceso, creándolo si hace falta."""
+    if cuantizar not in _readers_easyocr:
+        with _lock_creacion_easyocr:
+            if cuantizar not in _readers_easyocr:
+                import easyocr
+
+                _readers_easyocr[cuantizar] = easyocr.Reader(
+                    ["es", "en"], gpu=False, quantize=cuantizar
+                )
+    return _readers_easyocr[cuantizar]
+
+
+def ocr_easyocr(pix, reader=None):
+    """Extrae el texto del pixmap con EasyOCR."""
+    if reader is None:
+        reader = obtener_reader_easyocr()
+    with _lock_easyocr:
+        resultados = reader.readtext(pixmap_a_array(pix))
+    return " ".join([resultado[1] for resultado in resultados])
+
+
+def ocr_easyocr_renglones(pix, reader=None, batch_size=LOTE_RECONOCEDOR_EASYOCR):
+    """Extrae el texto con EasyOCR sin pasar por su detector de texto.
+
+    Los renglones se ubican con `cajas_renglones` (NumPy) y se leen todos con
+    el reconocedor en lotes. Es bastante más rápido que `ocr_easyocr`, pero
+    solo sirve si la región tiene texto en renglones horizontales y derechos
+    (sin columnas que se toquen ni escaneos torcidos).
+    """
+    if reader is None:
+        reader = obtener_reader_easyocr()
+    gris = pixmap_a_array(pix)
+    if gris.ndim == 3:
+        gris = gris[:, :, :3].mean(axis=2).astype(gris.dtype)
+    cajas = cajas_renglones(gris)
+    if not cajas:
+        return ""
+    with _lock_easyocr:
+        textos = reader.recognize(
+            gris,
+            horizontal_list=cajas,
+            free_list=[],
+            batch_size=batch_size,
+            detail=0,
+        )
+    return " ".join(textos)
+
+
+def ocr_easyocr_lote(pixmaps, reader=None, batch_size=LOTE_RECONOCEDOR_EASYOCR):
+    """Extrae el texto de varios pixmaps con una sola llamada batched de EasyOCR.
+
+    `readtext_batched` necesita imágenes del mismo tamaño, así que los pixmaps
+    se agrupan por tamaño (los recortes de un mismo PDF suelen coincidir).
+    Devuelve los textos en el mismo orden que los pixmaps.
+    """
+    if reader is None:
+        reader = obtener_reader_easyocr()
+    grupos = {}
+    for indice, pix in enumerate(pixmaps):
+        grupos.setdefault((pix.width, pix.height, pix.n), []).append(indice)
+
+    textos = [None] * len(pixmaps)
+    for indices in grupos.values():
+        with _lock_easyocr:
+            resultados_lote = reader.readtext_batched(
+                [pixmap_a_array(pixmaps[indice]) for indice in indices],
+                batch_size=batch_size,
+            )
+        for indice, resultados in zip(indices, resultados_lote):
+            textos[indice] = " ".join([resultado[1] for resultado in resultados])
+    return textos
+
+
+def ocr_cascada(pix):
+    """Extrae el texto con Tesseract y, solo si hace falta, con EasyOCR.
+
+    La lectura de Tesseract se usa si la confianza media de sus palabras
+    llega a UMBRAL_CONFIANZA_CASCADA; si no, la página se lee con EasyOCR, más
+    lento pero más robusto con escaneos malos. Las páginas sin evidencia no
+    pasan por EasyOCR si Tesseract las leyó bien: son casi todas las que no
+    son facturas.
+    """
+    texto, confianza = ocr_tesseract_confianza(pix)
+    if confianza >= UMBRAL_CONFIANZA_CASCADA:
+        return texto
+    return ocr_easyocr(pix)
+
+
+def hilos_torch_por_proceso(workers=1):
+    """Hilos de torch para cada proceso: los núcleos repartidos entre los procesos.
+
+    Sin un límite, cada proceso usa todos los núcleos y con varios procesos
+    (o sesiones) se pisan entre ellos.
+    """
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def configurar_hilos_torch(hilos):
+    """Define los hilos que usa torch (EasyOCR en CPU) en este proceso."""
+    if hilos:
+        import torch
+
+        torch.set_num_threads(int(hilos))
+
+
+@lru_cache(maxsize=None)
+def version_motor(motor):
+    """Nombre y versión del motor que se usa realmente (para la caché de OCR)."""
+    try:
+        if motor == "cascada":
+            return (
+                f"cascada-{version_motor('tesseract')}+{version_motor('easyocr')}"
+                f"@{UMBRAL_CONFIANZA_CASCADA}"
+            )
+        if motor in MOTORES_EASYOCR:
+            import easyocr
+
+            cuantizado = "-int8" if CUANTIZAR_EASYOCR else ""
+            return f"{motor}-{easyocr.__version__}{cuantizado}"
+        if motor == "tesserocr" or (motor == "tesseract" and tesserocr_disponible()):
+            import tesserocr
+
+            return f"tesserocr-{tesserocr.tesseract_version().split()[1]}"
+        if motor in ("tesseract", "pytesseract"):
+            import pytesseract
+
+            return f"pytesseract-{pytesseract.get_tesseract_version()}"
+    except Exception:
+        pass
+    return motor
+
+
+# Motores disponibles por nombre (los procesos del pool los reciben así)
+MOTORES_OCR = {
+    "tesseract": ocr_tesseract,
+    "tesserocr": ocr_tesserocr,
+    "pytesseract": ocr_pytesseract,
+    "easyocr": ocr_easyocr,
+    "easyocr-renglones": ocr_easyocr_renglones,
+    "cascada": ocr_cascada,
+}
+
+# Motores que usan EasyOCR (y torch): a estos se les limitan los hilos
+MOTORES_EASYOCR = {"easyocr", "easyocr-renglones", "cascada"}
+
+# Motores que leen varias páginas por llamada
+MOTORES_OCR_LOTE = {
+    "easyocr": ocr_easyocr_lote,
+}
@@ -0,0 +1,177 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from extraccion import FRACCION_RECORTE, contar_paginas, extraer_textos_pdf
+from motores_ocr import (
+    MOTORES_OCR,
+    MOTORES_OCR_LOTE,
+    configurar_hilos_torch,
+    configurar_tesseract,
+)
+
+# Desde esta cantidad de páginas un PDF se reparte entre los procesos del pool
+UMBRAL_PAGINAS_REPARTO = 40
+
+
+def workers_disponibles():
+    """Cantidad de núcleos disponibles para el pool de procesos."""
+    return os.cpu_count() or 1
+
+
+def mapear_en_paralelo(
+    funcion,
+    tareas,
+    workers=1,
+    inicializador=None,
+    args_inicializador=(),
+    al_terminar=None,
+):
+    """Ejecuta funcion(*tarea) para cada tarea en un pool de procesos.
+
+    Los resultados se devuelven en el mismo orden que las tareas, igual que
+    en una ejecución secuencial. Con workers <= 1 no se crea ningún proceso.
+    `al_terminar`, si se indica, recibe cada resultado apenas está listo (en
+    el orden en que terminan); si lanza una excepción, las tareas que no
+    empezaron se cancelan.
+    Los procesos se crean con spawn, también en Linux: con fork heredarían los
+    locks tomados por otros hilos (las sesiones de Streamlit) y el estado de
+    torch del proceso principal.
+    """
+    tareas = list(tareas)
+    if workers <= 1 or len(tareas) <= 1:
+        resultados = []
+        for tarea in tareas:
+            resultados.append(funcion(*tarea))
+            if al_terminar is not None:
+                al_terminar(resultados[-1])
+        return resultados
+
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(tareas)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=inicializador,
+        initargs=args_inicializador,
+    ) as executor:
+        futuros = [executor.submit(funcion, *tarea) for tarea in tareas]
+        if al_terminar is not None:
+            try:
+                for futuro in as_completed(futuros):
+                    al_terminar(futuro.result())
+            except BaseException:
+                for futuro in futuros:
+                    futuro.cancel()
+                raise
+        return [futuro.result() for futuro in futuros]
+
+
+def inicializar_worker(tesseract_cmd=None, hilos_torch=None):
+    """Prepara cada proceso del pool (la configuración no se hereda en spawn)."""
+    configurar_tesseract(tesseract_cmd)
+    configurar_hilos_torch(hilos_torch)
+
+
+def extraer_textos_en_worker(
+    pdf,
+    motor,
+    usar_capa_texto=True,
+    fraccion_recorte=FRACCION_RECORTE,
+    paginas=None,
+    cache=None,
+    tamano_lote=1,
+    preprocesar=False,
+    escalonada=False,
+):
+    """Extrae los textos de un PDF (o de algunas páginas) en un proceso del pool.
+
+    `pdf` es la ruta o el contenido en bytes (un documento abierto no se puede
+    enviar a otro proceso). Devuelve (textos, métodos, error, tiempos por
+    página), es decir, lo de `extraer_textos_pdf` más sus `tiempos`.
+    """
+    tiempos = []
+    textos, metodos, error = extraer_textos_pdf(
+        pdf,
+        MOTORES_OCR[motor],
+        usar_capa_texto,
+        fraccion_recorte,
+        paginas,
+        cache,
+        MOTORES_OCR_LOTE.get(motor) if tamano_lote > 1 else None,
+        tamano_lote,
+        tiempos=tiempos,
+        preprocesar=preprocesar,
+        escalonada=escalonada,
+    )
+    return textos, metodos, error, tiempos
+
+
+def repartir_paginas(total_paginas, partes):
+    """Divide las páginas en rangos contiguos de tamaño parecido, en orden."""
+    partes = max(1, min(partes, total_paginas))
+    tamano, resto = divmod(total_paginas, partes)
+    rangos = []
+    inicio = 0
+    for parte in range(partes):
+        fin = inicio + tamano + (1 if parte < resto else 0)
+        rangos.append(range(inicio, fin))
+        inicio = fin
+    return rangos
+
+
+def extraer_textos_repartidos(
+    pdf,
+    motor,
+    workers,
+    usar_capa_texto=True,
+    fraccion_recorte=FRACCION_RECORTE,
+    inicializador=None,
+    args_inicializador=(),
+    cache=None,
+    tamano_lote=1,
+    progreso=None,
+    tiempos=None,
+    preprocesar=False,
+    escalonada=False,
+):
+    """Extrae los textos de un PDF grande repartiendo sus páginas entre procesos.
+
+    Cada proceso reabre el documento (un documento de fitz no se comparte entre
+    procesos) y lee un rango contiguo de páginas. Los textos se vuelven a unir
+    en orden, con el mismo formato que `extraer_textos_pdf` (también los
+    `tiempos`). `progreso` se llama con las páginas de cada rango a medida que
+    los procesos terminan.
+    """
+    tareas = [
+        (
+            pdf,
+            motor,
+            usar_capa_texto,
+            fraccion_recorte,
+            rango,
+            cache,
+            tamano_lote,
+            preprocesar,
+            escalonada,
+        )
+        for rango in repartir_paginas(contar_paginas(pdf), workers)
+    ]
+    resultados = mapear_en_paralelo(
+        extraer_textos_en_worker,
+        tareas,
+        workers,
+        inicializador,
+        args_inicializador,
+        None if progreso is None else lambda resultado: progreso(len(resultado[1])),
+    )
+
+    textos_paginas = []
+    metodos_paginas = []
+    for textos_rango, metodos_rango, error, tiempos_rango in resultados:
+        textos_paginas.extend(textos_rango)
+        metodos_paginas.extend(metodos_rango)
+        if tiempos is not None:
+            tiempos.extend(tiempos_rango)
+        if error:
+            # Cortar en el primer error para que los índices sigan siendo válidos
+            return textos_paginas, metodos_paginas, error
+    return textos_paginas, metodos_paginas, None
@@ -0,0 +1,71 @@
+import io
+import zipfile
+
+# Compresión del ZIP de resultados: los PDFs ya vienen comprimidos, así que un
+# nivel bajo reduce casi lo mismo que uno alto en mucho menos tiempo
+NIVEL_COMPRESION_ZIP = 1
+
+# Al guardar un PDF filtrado: garbage=1 descarta los objetos de las páginas
+# quitadas (sus imágenes incluidas) y deflate=True vuelve a comprimir los
+# streams (más lento; sirve si el original tiene streams sin comprimir)
+GARBAGE_SALIDA = 1
+DEFLATE_SALIDA = False
+
+
+def pdf_con_paginas(
+    doc, paginas, destino=None, garbage=GARBAGE_SALIDA, deflate=DEFLATE_SALIDA
+):
+    """Deja en el documento solo `paginas` y lo guarda en `destino` o como bytes.
+
+    Usa `select` sobre el documento abierto en vez de copiar página por página
+    a un documento nuevo, así que `doc` queda modificado: llamarla al final.
+    Devuelve `destino` o, sin destino, el contenido en bytes.
+    """
+    doc.select(list(paginas))
+    if destino is None:
+        return doc.tobytes(garbage=garbage, deflate=deflate)
+    doc.save(destino, garbage=garbage, deflate=deflate)
+    return destino
+
+
+class EscritorResultados:
+    """Junta los PDFs resultantes para la descarga.
+
+    Con ZIP, cada PDF se agrega al ZIP en memoria apenas se genera y no se
+    guarda aparte, así el pico de memoria es el tamaño del ZIP y no el doble.
+    Sin ZIP, se conservan los PDFs para descargarlos uno por uno.
+    """
+
+    def __init__(self, crear_zip=True, nivel_compresion=NIVEL_COMPRESION_ZIP):
+        self.crear_zip = crear_zip
+        # Nombres de los PDFs agregados, en orden
+        self.nombres = []
+        # (nombre, contenido) de cada PDF cuando no se arma el ZIP
+        self.archivos = []
+        self._buffer = None
+        self._zip = None
+        if crear_zip:
+            self._buffer = io.BytesIO()
+            self._zip = zipfile.ZipFile(
+                self._buffer,
+                "w",
+                compression=zipfile.ZIP_DEFLATED,
+                compresslevel=nivel_compresion,
+            )
+
+    def agregar(self, nombre, contenido):
+        """Agrega un PDF resultante (al ZIP, si se está armando)."""
+        self.nombres.append(nombre)
+        if self._zip is not None:
+            self._zip.writestr(nombre, contenido)
+        else:
+            self.archivos.append((nombre, contenido))
+
+    def cerrar_zip(self):
+        """Termina el ZIP y devuelve su buffer (None si no se armó un ZIP)."""
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+        if self._buffer is not None:
+            self._buffer.seek(0)
+        return self._buffer
@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+
+import fitz  # PyMuPDF
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lector import LectorFacturas  # noqa: E402
+from manifiesto import Manifiesto  # noqa: E402
+
+
+def crear_pdf(ruta):
+    doc = fitz.open()
+    doc.new_page().insert_text((50, 60), "FACTURA N° 0001-00000001", fontsize=11)
+    doc.save(ruta)
+    doc.close()
+    # Fecha de modificación vieja: el archivo ya está "estable"
+    antes = time.time() - 60
+    os.utime(ruta, (antes, antes))
+
+
+def test_pdf_con_error_se_reintenta_con_el_mismo_orden(tmp_path):
+    carpeta = tmp_path / "entrada"
+    carpeta.mkdir()
+    crear_pdf(carpeta / "a.pdf")
+    crear_pdf(carpeta / "b.pdf")
+    manifiesto = Manifiesto(str(tmp_path / "manifiesto.jsonl"))
+
+    pendientes = manifiesto.pendientes(str(carpeta))
+    assert [os.path.basename(p.pdf) for p in pendientes] == ["a.pdf", "b.pdf"]
+    a, b = pendientes
+    manifiesto.registrar_procesado(a, {"salida": None, "error": "tesseract timeout"})
+    manifiesto.registrar_procesado(b, {"salida": "002_b.pdf", "error": None})
+
+    # El PDF que falló sigue pendiente (sin haber cambiado) y con su número;
+    # lo mismo al volver a abrir el manifiesto
+    for revision in (manifiesto, Manifiesto(manifiesto.ruta)):
+        pendientes = revision.pendientes(str(carpeta))
+        assert [(os.path.basename(p.pdf), p.orden) for p in pendientes] == [
+            ("a.pdf", a.orden)
+        ]
+
+    manifiesto.registrar_procesado(
+        pendientes[0], {"salida": "001_a.pdf", "error": None}
+    )
+    assert manifiesto.pendientes(str(carpeta)) == []
+
+
+def test_vigilar_carpeta_sigue_despues_de_un_error(tmp_path, monkeypatch):
+    carpeta = tmp_path / "entrada"
+    carpeta.mkdir()
+    crear_pdf(carpeta / "a.pdf")
+    manifiesto = Manifiesto(str(tmp_path / "manifiesto.jsonl"))
+    lector = LectorFacturas(usar_cache_ocr=False, directorio_salida=str(tmp_path))
+    revisiones = []
+
+    def procesar_pdfs(pdfs, al_terminar=None, numeros=None):
+        revisiones.append(pdfs)
+        raise RuntimeError("se cayó el pool")
+
+    def dormir(segundos):
+        # La segunda revisión también falla; Ctrl+C corta la vigilancia
+        if len(revisiones) >= 2:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(lector, "procesar_pdfs", procesar_pdfs)
+    monkeypatch.setattr(time, "sleep", dormir)
+    with pytest.raises(KeyboardInterrupt):
+        lector.vigilar_carpeta(str(carpeta), manifiesto, intervalo=0)
+    assert len(revisiones) == 2
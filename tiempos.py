@@ -0,0 +1,109 @@
+import csv
+import io
+import json
+from collections import Counter
+
+# Etapas que se miden por página: lectura de la caché de OCR, capa de texto,
+# renderizado de la región, preprocesamiento de la imagen, OCR, clasificación
+# y PDF de salida (el tiempo de guardar el PDF se reparte en partes iguales
+# entre sus páginas)
+ETAPAS_PAGINA = [
+    "cache",
+    "capa",
+    "render",
+    "preproceso",
+    "ocr",
+    "clasificacion",
+    "salida",
+]
+
+# Columnas del reporte por página ("lecturas" es cuántas veces se leyó la
+# página: más de una con la lectura escalonada, 0 si salió de la caché)
+COLUMNAS_TIEMPOS = [
+    "orden",
+    "pdf",
+    "pagina",
+    "metodo",
+    "lecturas",
+    "factura",
+] + ETAPAS_PAGINA
+
+
+def filas_tiempos(orden, pdf, metodos, tiempos_paginas, paginas_facturas):
+    """Filas del reporte (una por página) de un PDF procesado.
+
+    `tiempos_paginas` tiene, por página, los segundos de cada etapa por la
+    que pasó; `paginas_facturas` son los índices (desde 0) de las facturas.
+    """
+    facturas = set(paginas_facturas)
+    filas = []
+    for idx, (metodo, tiempos_pagina) in enumerate(zip(metodos, tiempos_paginas)):
+        fila = {
+            "orden": orden,
+            "pdf": pdf,
+            "pagina": idx + 1,
+            "metodo": "cache" if "cache" in tiempos_pagina else metodo,
+            "lecturas": tiempos_pagina.get("lecturas", 0),
+            "factura": idx in facturas,
+        }
+        for etapa in ETAPAS_PAGINA:
+            fila[etapa] = round(tiempos_pagina.get(etapa, 0.0), 6)
+        filas.append(fila)
+    return filas
+
+
+def resumen_tiempos(filas):
+    """Totales por etapa: páginas que pasaron por ella, segundos, ms/página y %."""
+    total = sum(fila[etapa] for fila in filas for etapa in ETAPAS_PAGINA)
+    resumen = []
+    for etapa in ETAPAS_PAGINA:
+        segundos = [fila[etapa] for fila in filas if fila[etapa]]
+        if not segundos:
+            continue
+        resumen.append(
+            {
+                "etapa": etapa,
+                "paginas": len(segundos),
+                "segundos": round(sum(segundos), 3),
+                "ms_por_pagina": round(sum(segundos) / len(segundos) * 1000, 3),
+                "porcentaje": round(sum(segundos) / total * 100, 1) if total else 0.0,
+            }
+        )
+    return resumen
+
+
+def resumen_lecturas(filas):
+    """Páginas leídas una vez, dos veces, ... ({lecturas: páginas}, sin la caché)."""
+    return dict(sorted(Counter(f["lecturas"] for f in filas if f["lecturas"]).items()))
+
+
+def tiempos_a_csv(filas):
+    """Reporte por página en CSV (texto)."""
+    salida = io.StringIO()
+    escritor = csv.DictWriter(salida, fieldnames=COLUMNAS_TIEMPOS)
+    escritor.writeheader()
+    escritor.writerows(filas)
+    return salida.getvalue()
+
+
+def tiempos_a_json(filas):
+    """Reporte en JSON: el resumen por etapa, las lecturas y las filas por página."""
+    return json.dumps(
+        {
+            "resumen": resumen_tiempos(filas),
+            "lecturas": resumen_lecturas(filas),
+            "paginas": filas,
+        },
+        ensure_ascii=False,
+        indent=2,
+    )
+
+
+def guardar_tiempos(filas, ruta):
+    """Guarda el reporte en `ruta`, en JSON si termina en .json y si no en CSV."""
+    if ruta.lower().endswith(".json"):
+        contenido = tiempos_a_json(filas)
+    else:
+        contenido = tiempos_a_csv(filas)
+    with open(ruta, "w", encoding="utf-8", newline="") as archivo:
+        archivo.write(contenido)
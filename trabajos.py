@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import namedtuple
+
+from extraccion import LecturaCancelada
+
+# Lo que pasó con cada archivo procesado, para mostrarlo en la página: los
+# métodos de lectura por página, las páginas de facturas, si el resultado vino
+# de la caché, los avisos (errores), el nombre del PDF generado (o None) y los
+# segundos de cada etapa por página (ver `tiempos`)
+InformeArchivo = namedtuple(
+    "InformeArchivo",
+    [
+        "numero_orden",
+        "nombre",
+        "metodos",
+        "paginas_facturas",
+        "desde_cache",
+        "avisos",
+        "salida",
+        "tiempos",
+    ],
+)
+
+
+class TrabajoCancelado(LecturaCancelada):
+    """Se pidió cancelar el trabajo (por ejemplo, porque cambió la subida)."""
+
+
+class Trabajo:
+    """Procesamiento de una subida en un hilo en segundo plano.
+
+    La página de Streamlit guarda el trabajo en `st.session_state` y lo consulta
+    en cada ejecución, así el avance y los resultados sobreviven a los reruns.
+    El hilo no llama a Streamlit: solo actualiza este estado.
+    """
+
+    def __init__(self, firma, paginas_totales):
+        # Identifica la subida y las opciones con las que se lanzó el trabajo
+        self.firma = firma
+        self.paginas_totales = paginas_totales
+        self.paginas_hechas = 0
+        self.archivo_actual = None
+        # Valor que devuelve la función del trabajo y error si falló
+        self.resultado = None
+        self.error = None
+        self.inicio = None
+        self.fin = None
+        self._informes = []
+        self._cancelado = threading.Event()
+        self._lock = threading.Lock()
+        self._hilo = None
+
+    def iniciar(self, funcion, *args):
+        """Ejecuta funcion(*args, trabajo) en un hilo; su valor queda en `resultado`."""
+        self.inicio = time.monotonic()
+        self._hilo = threading.Thread(
+            target=self._ejecutar, args=(funcion, args), daemon=True
+        )
+        self._hilo.start()
+
+    def _ejecutar(self, funcion, args):
+        try:
+            self.resultado = funcion(*args, self)
+        except TrabajoCancelado:
+            pass
+        except Exception as e:
+            self.error = str(e) or repr(e)
+        finally:
+            self.fin = time.monotonic()
+
+    @property
+    def en_curso(self):
+        return self._hilo is not None and self.fin is None
+
+    @property
+    def cancelado(self):
+        return self._cancelado.is_set()
+
+    def cancelar(self):
+        """Pide al hilo que se detenga en la próxima página."""
+        self._cancelado.set()
+
+    def comprobar_cancelacion(self):
+        """Lanza `TrabajoCancelado` si se pidió cancelar."""
+        if self._cancelado.is_set():
+            raise TrabajoCancelado()
+
+    def empezar_archivo(self, nombre):
+        """Indica qué se está procesando (se muestra junto al avance)."""
+        self.comprobar_cancelacion()
+        self.archivo_actual = nombre
+
+    def avanzar(self, paginas=1):
+        """Suma páginas leídas; lo llaman el hilo y los resultados del pool."""
+        with self._lock:
+            self.paginas_hechas += paginas
+        self.comprobar_cancelacion()
+
+    def agregar_informe(self, informe):
+        with self._lock:
+            self._informes.append(informe)
+
+    def informes(self):
+        """Informes de los archivos ya terminados, en orden."""
+        with self._lock:
+            return list(self._informes)
+
+    def progreso(self):
+        """Devuelve (páginas hechas, páginas totales, páginas/s, segundos restantes).
+
+        Los segundos restantes son None si todavía no se puede estimar o si el
+        trabajo ya terminó.
+        """
+        with self._lock:
+            hechas = self.paginas_hechas
+        fin = self.fin if self.fin is not None else time.monotonic()
+        segundos = max(fin - self.inicio, 1e-6) if self.inicio is not None else 0
+        velocidad = hechas / segundos if segundos else 0.0
+        restantes = None
+        if self.fin is None and velocidad > 0:
+            restantes = max(self.paginas_totales - hechas, 0) / velocidad
+        return hechas, self.paginas_totales, velocidad, restantes
+
+    def duracion(self):
+        """Segundos desde que empezó el trabajo (hasta que terminó, si terminó)."""
+        if self.inicio is None:
+            return 0.0
+        fin = self.fin if self.fin is not None else time.monotonic()
+        return fin - self.inicio
+
+
+def formatear_duracion(segundos):
+    """Formatea segundos como "m:ss" (o "h:mm:ss")."""
+    segundos = int(round(segundos))
+    horas, resto = divmod(segundos, 3600)
+    minutos, segundos = divmod(resto, 60)
+    if horas:
+        return f"{horas}:{minutos:02d}:{segundos:02d}"
+    return f"{minutos}:{segundos:02d}"